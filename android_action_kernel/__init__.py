@@ -1,22 +1,45 @@
 """Android Action Kernel - AI agents for Android devices."""
 
-from .config import Config, DEFAULT_WAIT_SECONDS, DEBUG_SEPARATOR_WIDTH, SPACE_REPLACEMENT
-from .exceptions import ADBError, ScreenCaptureError, LLMError
-from .adb import run_adb_command, get_screen_state
+from .config import (
+    Config,
+    get_config,
+    invalidate_config_cache,
+    DEFAULT_WAIT_SECONDS,
+    DEBUG_SEPARATOR_WIDTH,
+    SPACE_REPLACEMENT,
+)
+from .exceptions import ADBError, ScreenCaptureError, LLMError, GoalAchieved
+from .adb import (
+    AdbShellSession,
+    run_adb_command,
+    run_adb_commands,
+    run_adb_command_async,
+    get_screen_state,
+    get_screen_state_async,
+    wait_for_stable_ui,
+)
 from .actions import ActionExecutor
 from .agent import AndroidAgent
 from .llm import LLMClient
 
 __all__ = [
     "Config",
+    "get_config",
+    "invalidate_config_cache",
     "DEFAULT_WAIT_SECONDS",
     "DEBUG_SEPARATOR_WIDTH",
     "SPACE_REPLACEMENT",
     "ADBError",
     "ScreenCaptureError",
     "LLMError",
+    "GoalAchieved",
+    "AdbShellSession",
     "run_adb_command",
+    "run_adb_commands",
+    "run_adb_command_async",
     "get_screen_state",
+    "get_screen_state_async",
+    "wait_for_stable_ui",
     "ActionExecutor",
     "AndroidAgent",
     "LLMClient",
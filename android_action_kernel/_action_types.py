@@ -0,0 +1,46 @@
+"""Action names shared by the executor and the LLM layer."""
+from typing import Any, Dict, FrozenSet
+
+# Every action ActionExecutor has a handler for
+ACTION_TYPES: FrozenSet[str] = frozenset({
+    "tap",
+    "type",
+    "home",
+    "back",
+    "recent",
+    "settings",
+    "notification",
+    "swipe",
+    "swipe_down",
+    "swipe_up",
+    "swipe_left",
+    "swipe_right",
+    "long_press",
+    "key",
+    "key_batch",
+    "open_app",
+    "get_current_app",
+    "get_device_info",
+    "get_screen_info",
+    "wait",
+    "plan",
+    "done",
+})
+
+# Common invalid action names the LLM produces, mapped to valid ones
+ACTION_ALIASES: Dict[str, str] = {
+    "launch_app": "open_app",
+    "navigate": "home",
+    "click": "tap",
+    "press": "tap",
+    "scroll": "swipe_down",
+    "scroll_down": "swipe_down",
+    "scroll_up": "swipe_up",
+}
+
+
+def is_known_action(action_type: Any) -> bool:
+    """Whether an action type can be executed, directly or via an alias."""
+    if not isinstance(action_type, str):
+        return False
+    return action_type in ACTION_TYPES or action_type.lower() in ACTION_ALIASES
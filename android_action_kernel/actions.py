@@ -1,15 +1,116 @@
 """Action execution handlers for Android actions."""
 import time
+import asyncio
 import re
-from typing import Dict, Any, Callable
+import shlex
+import logging
+from typing import Dict, Any, Callable, List, Optional, Sequence, Tuple
 
+from ._action_types import ACTION_ALIASES
 from .config import Config, DEFAULT_WAIT_SECONDS, SPACE_REPLACEMENT
-from .adb import run_adb_command
+from .adb import run_adb_command, run_adb_commands
+from .exceptions import GoalAchieved
+
+logger = logging.getLogger(__name__)
+
+# Device info fields and the shell command that reads each one
+_DEVICE_INFO_QUERIES = (
+    ("model", "getprop ro.product.model"),
+    ("android_version", "getprop ro.build.version.release"),
+    ("api_level", "getprop ro.build.version.sdk"),
+    ("manufacturer", "getprop ro.product.manufacturer"),
+    ("device", "getprop ro.product.device"),
+    ("density", "wm density"),
+    ("screen_size", "wm size"),
+)
+_DEVICE_INFO_SEPARATOR = "---"
+
+# "mSurfaceOrientation=1" on older releases, "SurfaceOrientation: 1" on newer
+_ORIENTATION_RE = re.compile(r"SurfaceOrientation[=:]\s*(\d)")
+_ORIENTATIONS = {"0": "portrait", "1": "landscape", "2": "portrait", "3": "landscape"}
+
+# open_app verification polls the foreground activity until this deadline;
+# each poll is a full dumpsys round-trip, so the cap is on time, not attempts
+_LAUNCH_VERIFY_TIMEOUT = 1.0
+_LAUNCH_POLL_INTERVAL = 0.05
+# Android 10+ reports topResumedActivity instead of mResumedActivity
+_RESUMED_ACTIVITY_COMMAND = (
+    "shell",
+    "dumpsys activity activities | grep -m1 -E 'mResumedActivity|topResumedActivity'",
+)
+
+# Fire-and-forget actions a plan may batch into one device shell command;
+# queries and open_app verification need their own round-trip output
+_PLAN_ACTIONS = frozenset({
+    "tap", "type", "home", "back", "recent", "settings", "notification",
+    "swipe", "swipe_down", "swipe_up", "swipe_left", "swipe_right",
+    "long_press", "key", "key_batch", "wait",
+})
+
+# Map common keycode names to ADB keyevent codes
+_KEYCODE_MAP = {
+    "KEYCODE_ENTER": "66",
+    "KEYCODE_DEL": "67",
+    "KEYCODE_TAB": "61",
+    "KEYCODE_DPAD_UP": "19",
+    "KEYCODE_DPAD_DOWN": "20",
+    "KEYCODE_DPAD_LEFT": "21",
+    "KEYCODE_DPAD_RIGHT": "22",
+    "KEYCODE_MENU": "82",
+    "KEYCODE_SEARCH": "84",
+    "KEYCODE_CLEAR": "28",
+}
+
+# "package/activity" on the focus lines of `dumpsys activity activities` and
+# `dumpsys window windows`, e.g.
+# mResumedActivity: ActivityRecord{abc u0 com.android.settings/.Settings t12}
+# mCurrentFocus=Window{1f u0 com.android.settings/com.android.settings.Settings}
+_FOCUS_RE = re.compile(
+    r"(?:mResumedActivity|topResumedActivity|mLastPausedActivity|mCurrentFocus|mFocusedApp)"
+    r"[:=][^\n]*?\s([a-zA-Z][\w.]+)/([\w.$]+)"
+)
+
+def _resolve_keycode(keycode: Any) -> str:
+    """Returns the keyevent code for a keycode name, or the value unchanged."""
+    keycode = str(keycode)
+    return _KEYCODE_MAP.get(keycode.upper(), keycode)
+
+
+def _parse_screen_size(output: str) -> Tuple[int, int]:
+    """
+    Parses `wm size` output into (width, height).
+    
+    Raises:
+        ValueError: If the output does not contain a size
+    """
+    # Output format: "Physical size: 1080x1920" or "1080x1920"
+    _, sep, size_str = output.partition("Physical size:")
+    if not sep:
+        size_str = output
+    
+    # Only the first line matters; an "Override size:" line may follow
+    line = size_str.strip().partition("\n")[0]
+    width, sep, height = line.partition("x")
+    if not sep:
+        raise ValueError(f"Unexpected screen size output: {output!r}")
+    return int(width), int(height)
 
 
 class ActionExecutor:
     """Handles execution of actions decided by the LLM."""
     
+    __slots__ = (
+        "config", "_screen_dims", "_density", "_orientation",
+        "_swipe_argvs", "_swipe_argvs_dims", "_plan_batch",
+    )
+    
+    # Fixed commands, built once instead of on every action
+    _CMD_HOME = ("shell", "input", "keyevent", "KEYCODE_HOME")
+    _CMD_BACK = ("shell", "input", "keyevent", "KEYCODE_BACK")
+    _CMD_RECENT = ("shell", "input", "keyevent", "KEYCODE_APP_SWITCH")
+    _CMD_SETTINGS = ("shell", "input", "keyevent", "KEYCODE_SETTINGS")
+    _CMD_NOTIFICATION = ("shell", "input", "keyevent", "KEYCODE_NOTIFICATION")
+    
     def __init__(self, config: Config):
         """
         Initialize action executor.
@@ -18,28 +119,14 @@ class ActionExecutor:
             config: Configuration object
         """
         self.config = config
-        self._action_handlers: Dict[str, Callable[[Dict[str, Any]], None]] = {
-            "tap": self._handle_tap,
-            "type": self._handle_type,
-            "home": self._handle_home,
-            "back": self._handle_back,
-            "recent": self._handle_recent,
-            "settings": self._handle_settings,
-            "notification": self._handle_notification,
-            "swipe": self._handle_swipe,
-            "swipe_down": self._handle_swipe_down,
-            "swipe_up": self._handle_swipe_up,
-            "swipe_left": self._handle_swipe_left,
-            "swipe_right": self._handle_swipe_right,
-            "long_press": self._handle_long_press,
-            "key": self._handle_key,
-            "open_app": self._handle_open_app,
-            "get_current_app": self._handle_get_current_app,
-            "get_device_info": self._handle_get_device_info,
-            "get_screen_info": self._handle_get_screen_info,
-            "wait": self._handle_wait,
-            "done": self._handle_done,
-        }
+        # Device-constant values cached for the session
+        self._screen_dims: Optional[Tuple[int, int]] = None
+        self._density: Optional[str] = None
+        self._orientation: Optional[str] = None
+        self._swipe_argvs: Optional[Dict[str, Tuple[str, ...]]] = None
+        self._swipe_argvs_dims: Optional[Tuple[int, int]] = None
+        # Shell commands queued while a plan is being built, None otherwise
+        self._plan_batch: Optional[List[str]] = None
     
     def execute(self, action: Dict[str, Any]) -> None:
         """
@@ -50,39 +137,81 @@ class ActionExecutor:
             
         Raises:
             ValueError: If action type is not recognized
+            GoalAchieved: If the action is "done"
         """
         action_type = action.get("action")
         if not action_type:
             raise ValueError("Action missing 'action' field")
         
         # Map common invalid actions to valid ones
-        action_mapping = {
-            "launch_app": "open_app",
-            "navigate": "home",
-            "click": "tap",
-            "press": "tap",
-            "scroll": "swipe_down",
-            "scroll_down": "swipe_down",
-            "scroll_up": "swipe_up",
-        }
-        
-        # Try to map invalid action to valid one
-        if action_type not in self._action_handlers:
-            mapped_action = action_mapping.get(action_type.lower())
-            if mapped_action:
-                print(f"⚠️ Mapped invalid action '{action_type}' to '{mapped_action}'")
-                action_type = mapped_action
-                action["action"] = mapped_action
+        mapped_action = ACTION_ALIASES.get(action_type.lower(), action_type)
+        if mapped_action != action_type:
+            logger.warning("⚠️ Mapped invalid action '%s' to '%s'", action_type, mapped_action)
+            action_type = mapped_action
+            action["action"] = mapped_action
         
-        handler = self._action_handlers.get(action_type)
+        handler = self._HANDLERS.get(action_type)
         if not handler:
-            valid_actions = ", ".join(self._action_handlers.keys())
+            valid_actions = ", ".join(self._HANDLERS.keys())
             raise ValueError(
                 f"Unknown action type: {action_type}. "
                 f"Valid actions are: {valid_actions}"
             )
         
-        handler(action)
+        handler(self, action)
+    
+    async def execute_async(self, action: Dict[str, Any]) -> None:
+        """
+        Executes an action without blocking the event loop.
+        
+        Handlers stay synchronous (they share the locked persistent shell and
+        some sleep briefly), so the whole dispatch runs in a worker thread.
+        
+        Args:
+            action: Dictionary containing action type and parameters
+            
+        Raises:
+            ValueError: If action type is not recognized
+        """
+        await asyncio.to_thread(self.execute, action)
+    
+    def _send(self, command: Sequence[str], message: str, *args: Any) -> None:
+        """
+        Logs an input action and runs it, or queues it when a plan is being built.
+        
+        Args:
+            command: adb argv starting with "shell"
+            message: Log message, formatted lazily with args
+        """
+        logger.info(message, *args)
+        if self._plan_batch is not None:
+            self._plan_batch.append(" ".join(command[1:]))
+            return
+        run_adb_command(command, self.config, capture=False)
+    
+    def _handle_plan(self, action: Dict[str, Any]) -> None:
+        """Handle several actions sent in one shell command."""
+        steps = action.get("steps")
+        if not steps or not isinstance(steps, list):
+            raise ValueError("Plan action requires 'steps' list")
+        
+        logger.info("📋 Running plan of %d steps", len(steps))
+        self._plan_batch = []
+        try:
+            for step in steps:
+                if not isinstance(step, dict):
+                    raise ValueError("Plan steps must be action objects")
+                step_type = step.get("action")
+                if not isinstance(step_type, str):
+                    raise ValueError("Plan steps require a string 'action' field")
+                step_type = ACTION_ALIASES.get(step_type.lower(), step_type)
+                if step_type not in _PLAN_ACTIONS:
+                    raise ValueError(f"Action '{step_type}' cannot be part of a plan")
+                self.execute(step)
+            batch = "; ".join(self._plan_batch)
+        finally:
+            self._plan_batch = None
+        run_adb_command(["shell", batch], self.config, capture=False)
     
     def _handle_tap(self, action: Dict[str, Any]) -> None:
         """Handle tap action."""
@@ -91,8 +220,7 @@ class ActionExecutor:
             raise ValueError("Tap action requires 'coordinates' [x, y]")
         
         x, y = coordinates
-        print(f"👉 Tapping: ({x}, {y})")
-        run_adb_command(["shell", "input", "tap", str(x), str(y)], self.config)
+        self._send(("shell", "input", "tap", str(x), str(y)), "👉 Tapping: (%s, %s)", x, y)
     
     def _handle_type(self, action: Dict[str, Any]) -> None:
         """Handle type action."""
@@ -100,48 +228,57 @@ class ActionExecutor:
         if not text:
             raise ValueError("Type action requires 'text' field")
         
-        # ADB requires %s for spaces
-        adb_text = text.replace(" ", SPACE_REPLACEMENT)
-        print(f"⌨️ Typing: {text}")
-        run_adb_command(["shell", "input", "text", adb_text], self.config)
+        # ADB requires %s for spaces; quote the rest so the device shell
+        # passes $, quotes, backslashes and ; through literally
+        adb_text = shlex.quote(text.replace(" ", SPACE_REPLACEMENT))
+        self._send(("shell", "input", "text", adb_text), "⌨️ Typing: %s", text)
     
     def _handle_home(self, action: Dict[str, Any]) -> None:
         """Handle home action."""
-        print("🏠 Going Home")
-        run_adb_command(["shell", "input", "keyevent", "KEYCODE_HOME"], self.config)
+        self._send(self._CMD_HOME, "🏠 Going Home")
     
     def _handle_back(self, action: Dict[str, Any]) -> None:
         """Handle back action."""
-        print("🔙 Going Back")
-        run_adb_command(["shell", "input", "keyevent", "KEYCODE_BACK"], self.config)
+        self._send(self._CMD_BACK, "🔙 Going Back")
     
     def _handle_recent(self, action: Dict[str, Any]) -> None:
         """Handle recent apps action."""
-        print("📱 Opening Recent Apps")
-        run_adb_command(["shell", "input", "keyevent", "KEYCODE_APP_SWITCH"], self.config)
+        self._send(self._CMD_RECENT, "📱 Opening Recent Apps")
     
     def _handle_settings(self, action: Dict[str, Any]) -> None:
         """Handle settings action."""
-        print("⚙️ Opening Settings")
-        run_adb_command(["shell", "input", "keyevent", "KEYCODE_SETTINGS"], self.config)
+        self._send(self._CMD_SETTINGS, "⚙️ Opening Settings")
     
     def _handle_notification(self, action: Dict[str, Any]) -> None:
         """Handle notification panel action."""
-        print("🔔 Opening Notification Panel")
-        run_adb_command(["shell", "input", "keyevent", "KEYCODE_NOTIFICATION"], self.config)
+        self._send(self._CMD_NOTIFICATION, "🔔 Opening Notification Panel")
     
     def _handle_wait(self, action: Dict[str, Any]) -> None:
-        """Handle wait action."""
-        print("⏳ Waiting...")
-        time.sleep(DEFAULT_WAIT_SECONDS)
+        """
+        Handle wait action.
+        
+        Inside a plan the wait runs on the device between the batched steps.
+        A top-level wait sends nothing and does not block: the agent already
+        gives the UI a longer settle before the next capture.
+        """
+        logger.info("⏳ Waiting...")
+        if self._plan_batch is not None:
+            self._plan_batch.append(f"sleep {DEFAULT_WAIT_SECONDS}")
+    
+    def refresh_screen_dims(self) -> None:
+        """Forget cached screen dimensions, e.g. after a rotation."""
+        self._screen_dims = None
     
-    def _get_screen_dimensions(self):
+    def _get_screen_dimensions(self) -> Tuple[int, int]:
         """
-        Get screen dimensions from device.
+        Get screen dimensions from device, cached after the first query.
         
         Returns:
             Tuple of (width, height)
         """
+        if self._screen_dims is not None:
+            return self._screen_dims
+        
         try:
             # Get display size via ADB
             output = run_adb_command(
@@ -149,14 +286,8 @@ class ActionExecutor:
                 self.config, 
                 raise_on_error=False
             )
-            # Output format: "Physical size: 1080x1920" or "1080x1920"
-            if "Physical size:" in output:
-                size_str = output.split("Physical size:")[1].strip()
-            else:
-                size_str = output.strip()
-            
-            width, height = map(int, size_str.split("x"))
-            return width, height
+            self._screen_dims = _parse_screen_size(output)
+            return self._screen_dims
         except Exception:
             # Default to common Android screen size if query fails
             return 1080, 1920
@@ -174,63 +305,56 @@ class ActionExecutor:
         
         x1, y1 = start
         x2, y2 = end
-        print(f"👆 Swiping: ({x1}, {y1}) → ({x2}, {y2})")
-        run_adb_command([
-            "shell", "input", "swipe",
-            str(x1), str(y1), str(x2), str(y2), str(duration)
-        ], self.config)
+        self._send(
+            ("shell", "input", "swipe", str(x1), str(y1), str(x2), str(y2), str(duration)),
+            "👆 Swiping: (%s, %s) → (%s, %s)", x1, y1, x2, y2
+        )
+    
+    def _get_swipe_argvs(self) -> Dict[str, Tuple[str, ...]]:
+        """
+        Get the directional swipe commands, built once per screen size.
+        
+        Returns:
+            Dict mapping direction to adb argv (without the duration)
+        """
+        dims = self._get_screen_dimensions()
+        if self._swipe_argvs is None or self._swipe_argvs_dims != dims:
+            width, height = dims
+            center_x, center_y = str(width // 2), str(height // 2)
+            upper, lower = str(height // 3), str(height * 2 // 3)
+            left, right = str(width // 3), str(width * 2 // 3)
+            self._swipe_argvs = {
+                # Upper-middle to lower-middle
+                "down": ("shell", "input", "swipe", center_x, upper, center_x, lower),
+                # Lower-middle to upper-middle
+                "up": ("shell", "input", "swipe", center_x, lower, center_x, upper),
+                # Right-middle to left-middle
+                "left": ("shell", "input", "swipe", right, center_y, left, center_y),
+                # Left-middle to right-middle
+                "right": ("shell", "input", "swipe", left, center_y, right, center_y),
+            }
+            self._swipe_argvs_dims = dims
+        return self._swipe_argvs
     
     def _handle_swipe_down(self, action: Dict[str, Any]) -> None:
         """Handle swipe down (scroll down) action."""
-        width, height = self._get_screen_dimensions()
-        # Swipe from upper-middle to lower-middle
-        start = [width // 2, height // 3]
-        end = [width // 2, height * 2 // 3]
         duration = action.get("duration", 300)
-        print("⬇️ Swiping Down")
-        run_adb_command([
-            "shell", "input", "swipe",
-            str(start[0]), str(start[1]), str(end[0]), str(end[1]), str(duration)
-        ], self.config)
+        self._send((*self._get_swipe_argvs()["down"], str(duration)), "⬇️ Swiping Down")
     
     def _handle_swipe_up(self, action: Dict[str, Any]) -> None:
         """Handle swipe up (scroll up) action."""
-        width, height = self._get_screen_dimensions()
-        # Swipe from lower-middle to upper-middle
-        start = [width // 2, height * 2 // 3]
-        end = [width // 2, height // 3]
         duration = action.get("duration", 300)
-        print("⬆️ Swiping Up")
-        run_adb_command([
-            "shell", "input", "swipe",
-            str(start[0]), str(start[1]), str(end[0]), str(end[1]), str(duration)
-        ], self.config)
+        self._send((*self._get_swipe_argvs()["up"], str(duration)), "⬆️ Swiping Up")
     
     def _handle_swipe_left(self, action: Dict[str, Any]) -> None:
         """Handle swipe left action."""
-        width, height = self._get_screen_dimensions()
-        # Swipe from right-middle to left-middle
-        start = [width * 2 // 3, height // 2]
-        end = [width // 3, height // 2]
         duration = action.get("duration", 300)
-        print("⬅️ Swiping Left")
-        run_adb_command([
-            "shell", "input", "swipe",
-            str(start[0]), str(start[1]), str(end[0]), str(end[1]), str(duration)
-        ], self.config)
+        self._send((*self._get_swipe_argvs()["left"], str(duration)), "⬅️ Swiping Left")
     
     def _handle_swipe_right(self, action: Dict[str, Any]) -> None:
         """Handle swipe right action."""
-        width, height = self._get_screen_dimensions()
-        # Swipe from left-middle to right-middle
-        start = [width // 3, height // 2]
-        end = [width * 2 // 3, height // 2]
         duration = action.get("duration", 300)
-        print("➡️ Swiping Right")
-        run_adb_command([
-            "shell", "input", "swipe",
-            str(start[0]), str(start[1]), str(end[0]), str(end[1]), str(duration)
-        ], self.config)
+        self._send((*self._get_swipe_argvs()["right"], str(duration)), "➡️ Swiping Right")
     
     def _handle_long_press(self, action: Dict[str, Any]) -> None:
         """Handle long press action."""
@@ -241,12 +365,11 @@ class ActionExecutor:
             raise ValueError("Long press requires 'coordinates' [x, y]")
         
         x, y = coordinates
-        print(f"👆 Long pressing: ({x}, {y}) for {duration}ms")
         # Long press = swipe from same point to same point with duration
-        run_adb_command([
-            "shell", "input", "swipe",
-            str(x), str(y), str(x), str(y), str(duration)
-        ], self.config)
+        self._send(
+            ("shell", "input", "swipe", str(x), str(y), str(x), str(y), str(duration)),
+            "👆 Long pressing: (%s, %s) for %sms", x, y, duration
+        )
     
     def _handle_key(self, action: Dict[str, Any]) -> None:
         """Handle keyboard key press action."""
@@ -254,27 +377,22 @@ class ActionExecutor:
         if not keycode:
             raise ValueError("Key action requires 'keycode' field")
         
-        # Map common keycode names to ADB keyevent codes
-        keycode_map = {
-            "KEYCODE_ENTER": "66",
-            "KEYCODE_DEL": "67",
-            "KEYCODE_TAB": "61",
-            "KEYCODE_DPAD_UP": "19",
-            "KEYCODE_DPAD_DOWN": "20",
-            "KEYCODE_DPAD_LEFT": "21",
-            "KEYCODE_DPAD_RIGHT": "22",
-            "KEYCODE_MENU": "82",
-            "KEYCODE_SEARCH": "84",
-            "KEYCODE_CLEAR": "28",
-        }
+        keycode_value = _resolve_keycode(keycode)
         
-        # Use mapped value or assume it's already a number
-        keycode_value = keycode_map.get(keycode.upper(), keycode)
+        self._send(
+            ("shell", "input", "keyevent", str(keycode_value)), "⌨️ Pressing key: %s", keycode
+        )
+    
+    def _handle_key_batch(self, action: Dict[str, Any]) -> None:
+        """Handle several key presses sent in one shell command."""
+        keycodes = action.get("keycodes")
+        if not keycodes or not isinstance(keycodes, list):
+            raise ValueError("Key batch action requires 'keycodes' list")
         
-        print(f"⌨️ Pressing key: {keycode}")
-        run_adb_command([
-            "shell", "input", "keyevent", str(keycode_value)
-        ], self.config)
+        batch = " && ".join(
+            f"input keyevent {_resolve_keycode(keycode)}" for keycode in keycodes
+        )
+        self._send(("shell", batch), "⌨️ Pressing keys: %s", keycodes)
     
     def _handle_open_app(self, action: Dict[str, Any]) -> None:
         """Handle open app action."""
@@ -282,219 +400,181 @@ class ActionExecutor:
         if not package:
             raise ValueError("Open app requires 'package' field")
         
-        print(f"📱 Opening app: {package}")
+        logger.info("📱 Opening app: %s", package)
         # Try monkey command first (simpler, doesn't need activity name)
-        result = run_adb_command([
+        run_adb_command([
             "shell", "monkey", "-p", package,
             "-c", "android.intent.category.LAUNCHER", "1"
         ], self.config, raise_on_error=False)
         
-        # Check if it failed by trying to verify the app is running
-        # If monkey fails silently, we'll still try to verify
-        time.sleep(0.5)  # Give app time to launch
+        # monkey usually works, so verification is opt-in
+        if not action.get("verify", False):
+            return
         
-        # Verify app launched by checking current package
-        try:
-            current_package = run_adb_command([
-                "shell", "dumpsys", "window", "windows"
-            ], self.config, raise_on_error=False)
-            if package in current_package:
-                return  # Success
-        except Exception:
-            pass
+        # Poll the resumed activity instead of sleeping a fixed delay: most
+        # apps come to the foreground well before the cap
+        deadline = time.monotonic() + _LAUNCH_VERIFY_TIMEOUT
+        while True:
+            output = run_adb_command(
+                _RESUMED_ACTIVITY_COMMAND, self.config, raise_on_error=False
+            )
+            if package in output:
+                return
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(_LAUNCH_POLL_INTERVAL)
         
-        # If verification unclear, assume it worked (monkey usually works)
-        # Could raise error here if needed, but many apps launch successfully
+        logger.warning("⚠️ Could not verify that %s is running", package)
     
     def _handle_get_current_app(self, action: Dict[str, Any]) -> None:
         """Handle get current app action - outputs current app package/activity."""
-        print("🔍 Getting current app information...")
+        logger.info("🔍 Getting current app information...")
         
         try:
-            # Get current focused app from window manager
+            # The resumed activity line is all we need; grep it on-device so a
+            # couple hundred bytes cross ADB instead of the whole dump
             output = run_adb_command([
-                "shell", "dumpsys", "window", "windows"
+                "shell", "dumpsys activity activities"
+                " | grep -E 'mResumedActivity|topResumedActivity' | head -1"
             ], self.config, raise_on_error=False)
             
-            # Parse the output to find mCurrentFocus or mFocusedApp
             package = None
             activity = None
+            match = _FOCUS_RE.search(output)
             
-            for line in output.split('\n'):
-                if 'mCurrentFocus' in line or 'mFocusedApp' in line:
-                    # Format: mCurrentFocus=Window{... package/activity}
-                    # Or: mFocusedApp=AppWindowToken{... package/activity}
-                    if '/' in line:
-                        parts = line.split('/')
-                        if len(parts) >= 2:
-                            # Extract package and activity
-                            pkg_part = parts[0]
-                            act_part = parts[1].split()[0].split('}')[0]
-                            
-                            # Extract package name (usually before the last /)
-                            if '.' in pkg_part:
-                                package = pkg_part.split()[-1].split('/')[-1]
-                            else:
-                                # Try to extract from the full line
-                                match = re.search(r'([a-z][a-z0-9_]*\.[a-z][a-z0-9_.]*)', line)
-                                if match:
-                                    package = match.group(1)
-                            
-                            activity = act_part.strip()
-                            break
-            
-            # Alternative method: use dumpsys activity
-            if not package:
+            # Older devices: fall back to the window manager focus lines
+            if not match:
                 try:
-                    act_output = run_adb_command([
-                        "shell", "dumpsys", "activity", "activities"
+                    output = run_adb_command([
+                        "shell", "dumpsys", "window", "windows"
                     ], self.config, raise_on_error=False)
-                    
-                    # Look for mResumedActivity or mLastPausedActivity
-                    for line in act_output.split('\n'):
-                        if 'mResumedActivity' in line or 'mLastPausedActivity' in line:
-                            if '/' in line:
-                                parts = line.split('/')
-                                if len(parts) >= 2:
-                                    pkg = parts[0].split()[-1]
-                                    act = parts[1].split()[0].split('}')[0]
-                                    if '.' in pkg:
-                                        package = pkg
-                                        activity = act
-                                        break
+                    match = _FOCUS_RE.search(output)
                 except Exception:
                     pass
             
+            if match:
+                package, activity = match.group(1), match.group(2)
+            
             if package:
-                print(f"📱 Current App:")
-                print(f"   Package: {package}")
+                logger.info("📱 Current App:")
+                logger.info("   Package: %s", package)
                 if activity:
-                    print(f"   Activity: {activity}")
-                print(f"   Full: {package}/{activity if activity else 'unknown'}")
+                    logger.info("   Activity: %s", activity)
+                logger.info("   Full: %s/%s", package, activity or "unknown")
             else:
-                print("⚠️ Could not determine current app")
-                print(f"   Raw output: {output[:200]}...")
+                logger.warning("⚠️ Could not determine current app")
+                logger.warning("   Raw output: %.200s...", output)
                 
         except Exception as e:
-            print(f"❌ Failed to get current app: {str(e)}")
+            logger.error("❌ Failed to get current app: %s", e)
     
     def _handle_get_device_info(self, action: Dict[str, Any]) -> None:
         """Handle get device info action - outputs device information."""
-        print("🔍 Getting device information...")
+        logger.info("🔍 Getting device information...")
         
         try:
-            info = {}
-            
-            # Get device model
-            try:
-                model = run_adb_command([
-                    "shell", "getprop", "ro.product.model"
-                ], self.config, raise_on_error=False).strip()
-                if model:
-                    info["model"] = model
-            except Exception:
-                pass
-            
-            # Get Android version
-            try:
-                version = run_adb_command([
-                    "shell", "getprop", "ro.build.version.release"
-                ], self.config, raise_on_error=False).strip()
-                if version:
-                    info["android_version"] = version
-            except Exception:
-                pass
-            
-            # Get API level
-            try:
-                api_level = run_adb_command([
-                    "shell", "getprop", "ro.build.version.sdk"
-                ], self.config, raise_on_error=False).strip()
-                if api_level:
-                    info["api_level"] = api_level
-            except Exception:
-                pass
-            
-            # Get manufacturer
-            try:
-                manufacturer = run_adb_command([
-                    "shell", "getprop", "ro.product.manufacturer"
-                ], self.config, raise_on_error=False).strip()
-                if manufacturer:
-                    info["manufacturer"] = manufacturer
-            except Exception:
-                pass
+            # One shell round trip for every property instead of one per query
+            script = f"; echo {_DEVICE_INFO_SEPARATOR}; ".join(
+                command for _, command in _DEVICE_INFO_QUERIES
+            )
+            output = run_adb_command(["shell", script], self.config, raise_on_error=False)
             
-            # Get device name
-            try:
-                device = run_adb_command([
-                    "shell", "getprop", "ro.product.device"
-                ], self.config, raise_on_error=False).strip()
-                if device:
-                    info["device"] = device
-            except Exception:
-                pass
+            info = {}
+            values = output.split(_DEVICE_INFO_SEPARATOR)
+            for (key, _), value in zip(_DEVICE_INFO_QUERIES, values):
+                value = value.strip()
+                if value:
+                    info[key] = value
             
-            # Get screen density
-            try:
-                density = run_adb_command([
-                    "shell", "wm", "density"
-                ], self.config, raise_on_error=False).strip()
-                if density:
-                    info["density"] = density
-            except Exception:
-                pass
+            # The batch also answers the screen queries; prime their caches
+            if "density" in info:
+                self._density = info["density"]
+            if "screen_size" in info:
+                try:
+                    self._screen_dims = _parse_screen_size(info["screen_size"])
+                except ValueError:
+                    pass
             
             if info:
-                print("📱 Device Information:")
+                logger.info("📱 Device Information:")
                 for key, value in info.items():
-                    print(f"   {key.replace('_', ' ').title()}: {value}")
+                    logger.info("   %s: %s", key.replace("_", " ").title(), value)
             else:
-                print("⚠️ Could not retrieve device information")
+                logger.warning("⚠️ Could not retrieve device information")
                 
         except Exception as e:
-            print(f"❌ Failed to get device info: {str(e)}")
+            logger.error("❌ Failed to get device info: %s", e)
     
     def _handle_get_screen_info(self, action: Dict[str, Any]) -> None:
         """Handle get screen info action - outputs screen dimensions and orientation."""
-        print("🔍 Getting screen information...")
+        logger.info("🔍 Getting screen information...")
         
         try:
-            width, height = self._get_screen_dimensions()
+            # Orientation is always queried (grepped on-device so only one line
+            # crosses ADB); size and density only when not cached yet
+            queries = {"orientation": ["shell", "dumpsys input | grep -m1 SurfaceOrientation"]}
+            if self._screen_dims is None:
+                queries["size"] = ["shell", "wm", "size"]
+            if self._density is None:
+                queries["density"] = ["shell", "wm", "density"]
+            results = dict(zip(queries, run_adb_commands(list(queries.values()), self.config)))
             
-            # Get orientation
-            try:
-                orientation_output = run_adb_command([
-                    "shell", "dumpsys", "input"
-                ], self.config, raise_on_error=False)
-                
-                orientation = "unknown"
-                if "mSurfaceOrientation=0" in orientation_output or "mSurfaceOrientation=2" in orientation_output:
-                    orientation = "portrait"
-                elif "mSurfaceOrientation=1" in orientation_output or "mSurfaceOrientation=3" in orientation_output:
-                    orientation = "landscape"
-            except Exception:
-                orientation = "unknown"
+            match = _ORIENTATION_RE.search(results["orientation"])
+            orientation = _ORIENTATIONS.get(match.group(1), "unknown") if match else "unknown"
             
-            # Get density
-            try:
-                density_output = run_adb_command([
-                    "shell", "wm", "density"
-                ], self.config, raise_on_error=False)
-                density = density_output.strip() if density_output else "unknown"
-            except Exception:
-                density = "unknown"
+            # Cached dimensions are stale once the device has rotated
+            if self._orientation is not None and orientation != self._orientation:
+                self.refresh_screen_dims()
+            self._orientation = orientation
             
-            print("📱 Screen Information:")
-            print(f"   Dimensions: {width}x{height}")
-            print(f"   Orientation: {orientation}")
-            print(f"   Density: {density}")
-            print(f"   Aspect Ratio: {width/height:.2f}")
+            if "size" in results:
+                try:
+                    self._screen_dims = _parse_screen_size(results["size"])
+                except ValueError:
+                    pass
+            width, height = self._get_screen_dimensions()
+            
+            if results.get("density"):
+                self._density = results["density"]
+            density = self._density or "unknown"
+            
+            logger.info("📱 Screen Information:")
+            logger.info("   Dimensions: %sx%s", width, height)
+            logger.info("   Orientation: %s", orientation)
+            logger.info("   Density: %s", density)
+            logger.info("   Aspect Ratio: %.2f", width / height)
             
         except Exception as e:
-            print(f"❌ Failed to get screen info: {str(e)}")
+            logger.error("❌ Failed to get screen info: %s", e)
     
     def _handle_done(self, action: Dict[str, Any]) -> None:
         """Handle done action - task is complete."""
-        print("✅ Goal Achieved.")
-        # Note: The agent loop will handle exiting when it sees this action
+        # Unwinds to the agent loop, which shuts down and returns normally
+        raise GoalAchieved(action.get("reason", ""))
+    
+    # Action type -> handler, looked up once per class rather than per instance;
+    # the keys must match _action_types.ACTION_TYPES
+    _HANDLERS: Dict[str, Callable[["ActionExecutor", Dict[str, Any]], None]] = {
+        "tap": _handle_tap,
+        "type": _handle_type,
+        "home": _handle_home,
+        "back": _handle_back,
+        "recent": _handle_recent,
+        "settings": _handle_settings,
+        "notification": _handle_notification,
+        "swipe": _handle_swipe,
+        "swipe_down": _handle_swipe_down,
+        "swipe_up": _handle_swipe_up,
+        "swipe_left": _handle_swipe_left,
+        "swipe_right": _handle_swipe_right,
+        "long_press": _handle_long_press,
+        "key": _handle_key,
+        "key_batch": _handle_key_batch,
+        "open_app": _handle_open_app,
+        "get_current_app": _handle_get_current_app,
+        "get_device_info": _handle_get_device_info,
+        "get_screen_info": _handle_get_screen_info,
+        "wait": _handle_wait,
+        "plan": _handle_plan,
+        "done": _handle_done,
+    }
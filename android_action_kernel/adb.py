@@ -1,41 +1,551 @@
 """ADB command execution and screen capture functionality."""
-import os
-import json
+import asyncio
+import atexit
+import logging
+import queue
+import shlex
+import threading
 import subprocess
-from typing import List
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
 
-from . import sanitizer
-from .config import Config, SPACE_REPLACEMENT
+from . import _json, sanitizer
+from .config import Config, DEFAULT_WAIT_SECONDS, SPACE_REPLACEMENT
 from .exceptions import ADBError, ScreenCaptureError
 
+logger = logging.getLogger(__name__)
 
-def run_adb_command(command: List[str], config: Config, raise_on_error: bool = False) -> str:
+# Longest a command may run in the session before it is given up on; a UI
+# dump on a slow device takes a few seconds
+_SESSION_COMMAND_TIMEOUT = 15.0
+
+
+class AdbShellSession:
+    """
+    Long-lived ``adb shell`` process that runs commands fed through stdin.
+    
+    Spawning ``adb shell`` for every command pays the full client -> server ->
+    device handshake each time. A session keeps one shell open and frames
+    each command's output between a start sentinel and an end sentinel that
+    carries its exit code. Both carry a per-command sequence number, so
+    output left over from an interrupted command is skipped, not misread.
+    
+    Framing relies on stdout and stderr arriving separately, which needs the
+    device's shell_v2 protocol; see _session_enabled.
+    """
+    
+    def __init__(self, adb_path: str, timeout: float = _SESSION_COMMAND_TIMEOUT):
+        """
+        Initialize the shell session. The process is started lazily.
+        
+        Args:
+            adb_path: Path to the adb executable
+            timeout: Seconds a command may take before the session is killed
+        """
+        self.adb_path = adb_path
+        self.timeout = timeout
+        self.proc: Optional[subprocess.Popen] = None
+        self._stdout_lines: "queue.Queue[bytes]" = queue.Queue()
+        self._stderr_lines: "queue.Queue[bytes]" = queue.Queue()
+        token = uuid.uuid4().hex
+        self._begin_marker = f"__BEGIN_{token}_"
+        self._marker = f"__END_{token}_"
+        self._seq = 0
+        self._lock = threading.Lock()
+    
+    def _start(self) -> None:
+        """
+        Spawn the underlying ``adb shell`` process.
+        
+        The pipes stay binary: device output is UTF-8 whatever the host
+        locale, so it is only decoded, explicitly, once a command is done.
+        """
+        self.proc = subprocess.Popen(
+            [self.adb_path, "shell"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        # Both streams are drained on threads: a chatty command cannot fill
+        # one pipe while we wait on the other, and reads can time out
+        self._stdout_lines = queue.Queue()
+        self._stderr_lines = queue.Queue()
+        for stream, lines in (
+            (self.proc.stdout, self._stdout_lines),
+            (self.proc.stderr, self._stderr_lines),
+        ):
+            threading.Thread(
+                target=self._pump_lines, args=(stream, lines), daemon=True
+            ).start()
+    
+    @staticmethod
+    def _pump_lines(stream, lines: "queue.Queue[bytes]") -> None:
+        """Forward lines from a stream into a queue until the stream closes."""
+        try:
+            for line in stream:
+                lines.put(line)
+        finally:
+            # run() treats this as end of stream, so it must always arrive
+            lines.put(b"")
+    
+    def _next_line(self, lines: "queue.Queue[bytes]", deadline: float) -> bytes:
+        """
+        Returns the next line from a pump queue.
+        
+        Raises:
+            ADBError: If the shell exits or the deadline passes first; the
+                session is killed either way and restarts on the next command
+        """
+        try:
+            line = lines.get(timeout=max(deadline - time.monotonic(), 0))
+        except queue.Empty:
+            self._kill()
+            raise ADBError(
+                f"ADB shell session timed out after {self.timeout}s"
+            ) from None
+        if not line:
+            self._kill()
+            raise ADBError("ADB shell session terminated unexpectedly")
+        return line
+    
+    def run(self, command: str) -> Tuple[int, str, str]:
+        """
+        Runs a command in the shell session.
+        
+        Args:
+            command: Shell command line, interpreted by the device shell
+            
+        Returns:
+            Tuple of (exit code, stdout, stderr), decoded as UTF-8
+            
+        Raises:
+            ADBError: If the shell session terminates unexpectedly or the
+                command does not finish within the timeout
+        """
+        returncode, stdout, stderr = self.run_bytes(command)
+        return (
+            returncode,
+            stdout.decode("utf-8", errors="replace"),
+            stderr.decode("utf-8", errors="replace"),
+        )
+    
+    def run_bytes(self, command: str) -> Tuple[int, bytes, bytes]:
+        """
+        Runs a command in the shell session and returns its raw output.
+        
+        Args:
+            command: Shell command line, interpreted by the device shell
+            
+        Returns:
+            Tuple of (exit code, stdout, stderr), undecoded
+            
+        Raises:
+            ADBError: If the shell session terminates unexpectedly or the
+                command does not finish within the timeout
+        """
+        with self._lock:
+            if self.proc is None or self.proc.poll() is not None:
+                self._start()
+            
+            self._seq += 1
+            begin = f"{self._begin_marker}{self._seq}".encode()
+            end = f"{self._marker}{self._seq}:".encode()
+            self.proc.stdin.write(
+                b"printf '\\n%s\\n'; printf '\\n%s\\n' >&2\n" % (begin, begin)
+                + command.encode("utf-8") + b"\n"
+                + b"printf '\\n%s%%d\\n' \"$?\"; printf '\\n%s\\n' >&2\n" % (end, end)
+            )
+            self.proc.stdin.flush()
+            deadline = time.monotonic() + self.timeout
+            
+            # Skip anything still buffered from an earlier, interrupted command
+            while self._next_line(self._stdout_lines, deadline).rstrip(b"\r\n") != begin:
+                pass
+            
+            stdout_lines = []
+            while True:
+                line = self._next_line(self._stdout_lines, deadline)
+                if line.startswith(end):
+                    returncode = int(line[len(end):].strip())
+                    break
+                stdout_lines.append(line)
+            
+            while self._next_line(self._stderr_lines, deadline).rstrip(b"\r\n") != begin:
+                pass
+            
+            stderr_lines = []
+            while True:
+                line = self._next_line(self._stderr_lines, deadline)
+                if line.startswith(end):
+                    break
+                stderr_lines.append(line)
+            
+            # Drop the newline printf emits before each sentinel
+            stdout = b"".join(stdout_lines)[:-1]
+            stderr = b"".join(stderr_lines)[:-1]
+            return returncode, stdout, stderr
+    
+    def close(self) -> None:
+        """Terminates the shell process if it is running."""
+        proc, self.proc = self.proc, None
+        if proc is None or proc.poll() is not None:
+            return
+        try:
+            proc.stdin.write(b"exit\n")
+            proc.stdin.close()
+            proc.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+    
+    def _kill(self) -> None:
+        """Kills the shell process without waiting for the current command."""
+        proc, self.proc = self.proc, None
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+
+
+_shell_sessions: Dict[str, AdbShellSession] = {}
+# Whether each adb executable's device speaks shell_v2, checked once
+_shell_v2_support: Dict[str, bool] = {}
+
+
+def get_shell_session(config: Config) -> AdbShellSession:
+    """
+    Returns the shared shell session for the configured adb executable.
+    
+    Args:
+        config: Configuration object
+        
+    Returns:
+        AdbShellSession instance, created on first use
+    """
+    session = _shell_sessions.get(config.adb_path)
+    if session is None:
+        session = AdbShellSession(config.adb_path)
+        _shell_sessions[config.adb_path] = session
+    return session
+
+
+def close_shell_sessions() -> None:
+    """Closes every open shell session."""
+    for session in _shell_sessions.values():
+        session.close()
+    _shell_sessions.clear()
+
+
+atexit.register(close_shell_sessions)
+
+
+def ensure_device(config: Config, timeout: float = 10) -> None:
+    """
+    Starts the adb server and waits for a device to come online.
+    
+    Doing this up front keeps the server launch out of the first perception
+    step and fails fast when no device is connected.
+    
+    Args:
+        config: Configuration object
+        timeout: Seconds to wait for a device
+        
+    Raises:
+        ADBError: If adb is unavailable or no device is ready
+    """
+    adb = config.adb_path
+    try:
+        subprocess.run([adb, "start-server"], capture_output=True, check=False)
+        subprocess.run(
+            [adb, "wait-for-device"], capture_output=True, check=False, timeout=timeout
+        )
+        state = subprocess.run([adb, "get-state"], capture_output=True, text=True)
+    except subprocess.TimeoutExpired as e:
+        raise ADBError(f"No device connected after {timeout}s") from e
+    except OSError as e:
+        raise ADBError(f"Could not run adb at '{adb}': {str(e)}") from e
+    
+    if state.returncode != 0 or state.stdout.strip() != "device":
+        detail = state.stderr.strip() or state.stdout.strip()
+        raise ADBError(f"Device not ready: {detail}")
+
+
+def _supports_shell_v2(adb_path: str) -> bool:
+    """
+    Returns True if the device separates stdout and stderr in ``adb shell``.
+    
+    Without shell_v2, ``adb shell`` runs under a PTY that merges stderr into
+    stdout and ends lines with ``\\r\\n``, so the session never sees its
+    stderr sentinels. A failed check is retried on the next call.
+    """
+    supported = _shell_v2_support.get(adb_path)
+    if supported is None:
+        try:
+            result = subprocess.run(
+                [adb_path, "features"], capture_output=True, text=True, timeout=5
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+        if result.returncode != 0:
+            return False
+        supported = "shell_v2" in result.stdout.replace(",", " ").split()
+        _shell_v2_support[adb_path] = supported
+        if not supported:
+            logger.info("ℹ️ Device lacks shell_v2; running each adb shell command on its own")
+    return supported
+
+
+def _session_enabled(config: Config) -> bool:
+    """Returns True if shell commands should go through the persistent shell."""
+    return config.persistent_shell and _supports_shell_v2(config.adb_path)
+
+
+def _is_shell_command(command: Sequence[str], config: Config) -> bool:
+    """Returns True if the command should go through the persistent shell."""
+    return len(command) > 1 and command[0] == "shell" and _session_enabled(config)
+
+
+def _check_result(returncode: int, stderr: str, raise_on_error: bool) -> None:
+    """Reports a failed ADB command, raising if requested."""
+    if returncode != 0:
+        error_msg = f"ADB failed (code {returncode}): {stderr.strip()}"
+        logger.error("❌ %s", error_msg)
+        if raise_on_error:
+            raise ADBError(error_msg)
+
+
+def run_adb_command(
+    command: Sequence[str],
+    config: Config,
+    raise_on_error: bool = False,
+    capture: bool = True,
+) -> str:
     """
     Executes a shell command via ADB.
     
+    Commands starting with ``"shell"`` go through the persistent shell session
+    when ``config.persistent_shell`` is enabled and the device supports it, and
+    run as a one-shot ``adb shell`` if the session fails. As with ``adb shell``
+    itself, the remaining arguments are joined with spaces and parsed by the
+    device shell.
+    
     Args:
         command: List of command arguments (without 'adb' prefix)
         config: Configuration object
         raise_on_error: If True, raise ADBError on failure instead of just printing
+        capture: If False, discard stdout (stderr is kept for error messages)
         
     Returns:
-        Command output as string
+        Command output as string, or "" when capture is False
         
     Raises:
         ADBError: If command fails and raise_on_error is True
     """
-    full_command = [config.adb_path] + command
-    print(f"🔧 ADB: {' '.join(full_command)}")
+    full_command = [config.adb_path, *command]
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("🔧 ADB: %s", " ".join(full_command))
     
-    result = subprocess.run(full_command, capture_output=True, text=True)
+    session_result = None
+    if _is_shell_command(command, config):
+        shell_command = " ".join(command[1:])
+        if not capture:
+            shell_command = f"{{ {shell_command}; }} >/dev/null"
+        try:
+            session_result = get_shell_session(config).run(shell_command)
+        except ADBError as e:
+            logger.warning("⚠️ ADB shell session failed, running the command on its own: %s", e)
     
-    if result.returncode != 0:
-        error_msg = f"ADB failed (code {result.returncode}): {result.stderr.strip()}"
-        print(f"❌ {error_msg}")
-        if raise_on_error:
-            raise ADBError(error_msg)
+    if session_result is not None:
+        returncode, stdout, stderr = session_result
+    elif not capture:
+        result = subprocess.run(
+            full_command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+        returncode, stdout = result.returncode, ""
+        stderr = result.stderr.decode(errors="replace")
+    else:
+        # Device output is UTF-8 regardless of the host locale
+        result = subprocess.run(
+            full_command, capture_output=True, encoding="utf-8", errors="replace"
+        )
+        returncode, stdout, stderr = result.returncode, result.stdout, result.stderr
+    
+    _check_result(returncode, stderr, raise_on_error)
+    return stdout.strip()
+
+
+def run_adb_commands(
+    commands: List[List[str]], config: Config, raise_on_error: bool = False
+) -> List[str]:
+    """
+    Executes independent ADB commands, concurrently when each needs its own process.
+    
+    Args:
+        commands: List of commands, each without the 'adb' prefix
+        config: Configuration object
+        raise_on_error: If True, raise ADBError on failure instead of just printing
+        
+    Returns:
+        Output of each command, in order
+        
+    Raises:
+        ADBError: If a command fails and raise_on_error is True
+    """
+    # The persistent shell runs one command at a time, so threads gain nothing
+    if len(commands) < 2 or all(_is_shell_command(command, config) for command in commands):
+        return [run_adb_command(command, config, raise_on_error) for command in commands]
+    
+    with ThreadPoolExecutor(max_workers=len(commands)) as executor:
+        futures = [
+            executor.submit(run_adb_command, command, config, raise_on_error)
+            for command in commands
+        ]
+        return [future.result() for future in futures]
+
+
+async def run_adb_command_async(
+    command: Sequence[str],
+    config: Config,
+    raise_on_error: bool = False,
+    capture: bool = True,
+) -> str:
+    """
+    Executes an ADB command without blocking the event loop.
+    
+    Args:
+        command: List of command arguments (without 'adb' prefix)
+        config: Configuration object
+        raise_on_error: If True, raise ADBError on failure instead of just printing
+        capture: If False, discard stdout (stderr is kept for error messages)
+        
+    Returns:
+        Command output as string, or "" when capture is False
+        
+    Raises:
+        ADBError: If command fails and raise_on_error is True
+    """
+    if _is_shell_command(command, config):
+        # The shell session is synchronous; keep it off the event loop
+        return await asyncio.to_thread(
+            run_adb_command, command, config, raise_on_error, capture
+        )
+    
+    stdout = await _run_adb_bytes_async(command, config, raise_on_error, capture)
+    return stdout.decode(errors="replace").strip() if capture else ""
+
+
+def _run_adb_bytes(
+    command: Sequence[str], config: Config, raise_on_error: bool = False
+) -> bytes:
+    """Runs a one-shot ADB command and returns its raw stdout, undecoded."""
+    full_command = [config.adb_path, *command]
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("🔧 ADB: %s", " ".join(full_command))
+    
+    result = subprocess.run(full_command, capture_output=True)
+    _check_result(result.returncode, result.stderr.decode(errors="replace"), raise_on_error)
+    return result.stdout
+
+
+async def _run_adb_bytes_async(
+    command: Sequence[str],
+    config: Config,
+    raise_on_error: bool = False,
+    capture: bool = True,
+) -> bytes:
+    """Async counterpart of _run_adb_bytes; returns b"" when capture is False."""
+    full_command = [config.adb_path, *command]
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("🔧 ADB: %s", " ".join(full_command))
+    
+    proc = await asyncio.create_subprocess_exec(
+        *full_command,
+        stdout=asyncio.subprocess.PIPE if capture else asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await proc.communicate()
+    
+    _check_result(proc.returncode, stderr.decode(errors="replace"), raise_on_error)
+    return stdout or b""
+
+
+# Streams the UI hierarchy to stdout instead of a file on the device
+_STREAM_DUMP_COMMAND = ["exec-out", "uiautomator", "dump", "/dev/tty"]
+
+
+def _file_dump_command(dump_path: str) -> str:
+    """
+    Builds a shell command that dumps the UI hierarchy to a device file.
+    
+    The previous dump is removed first: uiautomator can print an error and
+    still exit 0, and reading back the last step's file would then look
+    like a screen that has not changed.
+    """
+    path = shlex.quote(dump_path)
+    return f"rm -f {path}; uiautomator dump {path}"
+
+
+def _session_dump(config: Config) -> Optional[bytes]:
+    """
+    Dumps and reads back the UI hierarchy inside the persistent shell.
+    
+    The session has no terminal, so it cannot use /dev/tty. It dumps to a
+    file and cats it in the same command instead, without spawning adb, and
+    keeps the output as bytes.
+    
+    Returns:
+        Raw command output, or None if the session or the dump failed
+    """
+    path = shlex.quote(config.screen_dump_path)
+    command = f"{_file_dump_command(config.screen_dump_path)} >/dev/null && cat {path}"
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("🔧 ADB session: %s", command)
+    try:
+        returncode, stdout, _ = get_shell_session(config).run_bytes(command)
+    except ADBError as e:
+        logger.warning("⚠️ ADB shell session failed, dumping over exec-out: %s", e)
+        return None
+    return stdout if returncode == 0 else None
+
+
+def _extract_hierarchy(output: bytes) -> Optional[bytes]:
+    """
+    Extracts the XML document from streamed uiautomator output.
+    
+    uiautomator appends a "UI hierchary dumped to: /dev/tty" banner after
+    the document, and prints only an error when it cannot dump. The output
+    stays as raw bytes so the parser reads the UTF-8 directly.
+    
+    Args:
+        output: Raw command output
+        
+    Returns:
+        XML bytes, or None if the output holds no hierarchy
+    """
+    start = output.find(b"<?xml")
+    if start < 0:
+        start = output.find(b"<hierarchy")
+    end = output.rfind(b"</hierarchy>")
+    if start < 0 or end < 0:
+        return None
+    return output[start:end + len(b"</hierarchy>")]
+
+
+def _to_screen_context(xml_content: bytes) -> str:
+    """Sanitizes UI XML into the JSON string sent to the LLM."""
+    return _json.dumps(sanitizer.get_interactive_elements(xml_content))
+
+
+def _require_hierarchy(output: bytes) -> bytes:
+    """
+    Extracts the XML document from a dump file read back over exec-out.
     
-    return result.stdout.strip()
+    Raises:
+        ScreenCaptureError: If the dump file is missing or empty
+    """
+    xml_content = _extract_hierarchy(output)
+    if xml_content is None:
+        raise ScreenCaptureError("Could not capture screen - dump file is missing or empty")
+    return xml_content
 
 
 def get_screen_state(config: Config) -> str:
@@ -52,21 +562,103 @@ def get_screen_state(config: Config) -> str:
         ScreenCaptureError: If screen capture fails
     """
     try:
-        # 1. Capture XML
-        run_adb_command(["shell", "uiautomator", "dump", config.screen_dump_path], config)
+        # 1. Dump through the already-open shell, or straight from stdout
+        xml_content = None
+        if _session_enabled(config):
+            output = _session_dump(config)
+            if output is not None:
+                xml_content = _extract_hierarchy(output)
+        if xml_content is None:
+            xml_content = _extract_hierarchy(_run_adb_bytes(_STREAM_DUMP_COMMAND, config))
         
-        # 2. Pull to local
-        run_adb_command(["pull", config.screen_dump_path, config.local_dump_path], config)
+        # 2. Some devices cannot dump to /dev/tty; dump to a file on the
+        #    device and stream it back instead of pulling it to local disk
+        if xml_content is None:
+            run_adb_command(["shell", _file_dump_command(config.screen_dump_path)], config)
+            xml_content = _require_hierarchy(
+                _run_adb_bytes(["exec-out", "cat", config.screen_dump_path], config)
+            )
         
-        # 3. Read & Sanitize
-        if not os.path.exists(config.local_dump_path):
-            raise ScreenCaptureError("Could not capture screen - dump file not found")
+        # 3. Sanitize
+        return _to_screen_context(xml_content)
         
-        with open(config.local_dump_path, "r", encoding="utf-8") as f:
-            xml_content = f.read()
+    except (ADBError, IOError, sanitizer.XMLParseError) as e:
+        raise ScreenCaptureError(f"Failed to capture screen state: {str(e)}") from e
+
+
+async def get_screen_state_async(config: Config) -> str:
+    """
+    Async counterpart of get_screen_state.
+    
+    Args:
+        config: Configuration object
         
-        elements = sanitizer.get_interactive_elements(xml_content)
-        return json.dumps(elements, indent=2)
+    Returns:
+        JSON string representation of interactive UI elements
+        
+    Raises:
+        ScreenCaptureError: If screen capture fails
+    """
+    try:
+        xml_content = None
+        if _session_enabled(config):
+            # The shell session is synchronous; keep it off the event loop
+            output = await asyncio.to_thread(_session_dump, config)
+            if output is not None:
+                xml_content = _extract_hierarchy(output)
+        if xml_content is None:
+            xml_content = _extract_hierarchy(
+                await _run_adb_bytes_async(_STREAM_DUMP_COMMAND, config)
+            )
+        
+        if xml_content is None:
+            await run_adb_command_async(
+                ["shell", _file_dump_command(config.screen_dump_path)], config
+            )
+            xml_content = _require_hierarchy(await _run_adb_bytes_async(
+                ["exec-out", "cat", config.screen_dump_path], config
+            ))
+        
+        # Parsing is CPU-bound; keep the event loop free while it runs
+        return await asyncio.to_thread(_to_screen_context, xml_content)
         
     except (ADBError, IOError, sanitizer.XMLParseError) as e:
         raise ScreenCaptureError(f"Failed to capture screen state: {str(e)}") from e
+
+
+# Consecutive captures during wait_for_stable_ui are this far apart
+_STABLE_POLL_INTERVAL = 0.15
+
+
+async def wait_for_stable_ui(
+    config: Config,
+    timeout: float = DEFAULT_WAIT_SECONDS,
+    interval: float = _STABLE_POLL_INTERVAL
+) -> str:
+    """
+    Captures the screen until two consecutive captures match.
+    
+    Replaces a fixed settle delay after each action: most screens stop
+    changing well before the cap, so the step ends as soon as they do.
+    
+    Args:
+        config: Configuration object
+        timeout: Seconds after which the latest capture is returned anyway
+        interval: Seconds between captures
+        
+    Returns:
+        JSON string representation of interactive UI elements
+        
+    Raises:
+        ScreenCaptureError: If screen capture fails
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    screen_context = await get_screen_state_async(config)
+    while loop.time() < deadline:
+        await asyncio.sleep(interval)
+        previous, screen_context = screen_context, await get_screen_state_async(config)
+        # The sanitized JSON is deterministic, so equal strings mean an equal UI
+        if screen_context == previous:
+            break
+    return screen_context
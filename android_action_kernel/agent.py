@@ -1,12 +1,25 @@
 """Main agent loop for Android automation."""
-import time
+import asyncio
+import hashlib
+import logging
+from typing import Optional
 
 from .config import Config, DEFAULT_WAIT_SECONDS
-from .exceptions import ScreenCaptureError, LLMError, ADBError
-from .adb import get_screen_state
+from .exceptions import ScreenCaptureError, LLMError, ADBError, GoalAchieved
+from .adb import (
+    ensure_device,
+    close_shell_sessions,
+    get_screen_state_async,
+    wait_for_stable_ui,
+)
 from .llm import LLMClient
 from .actions import ActionExecutor
 
+logger = logging.getLogger(__name__)
+
+# A "wait" decision lets the UI settle this many times longer than an action
+_WAIT_ACTION_FACTOR = 2
+
 
 class AndroidAgent:
     """Main agent that runs the perception -> reasoning -> action loop."""
@@ -17,8 +30,12 @@ class AndroidAgent:
         
         Args:
             config: Configuration object
+            
+        Raises:
+            ADBError: If no device is ready
         """
         self.config = config
+        ensure_device(config)
         self.llm_client = LLMClient(config)
         self.action_executor = ActionExecutor(config)
     
@@ -30,34 +47,109 @@ class AndroidAgent:
             goal: The goal to achieve
             max_steps: Maximum number of steps to execute
         """
-        print(f"🚀 Android Use Agent Started. Goal: {goal}")
-        print(f"📡 Using LLM Provider: {self.config.provider_name} ({self.config.model})")
+        asyncio.run(self.run_async(goal, max_steps))
+    
+    async def run_async(self, goal: str, max_steps: int = 20) -> None:
+        """
+        Async agent loop; the next screen is captured in a background task
+        started right after each action and awaited at the top of the next step.
+        The task returns as soon as the UI stops changing rather than after a
+        fixed delay. A settled screen that still matches the one the last
+        decision was made on gets one longer wait before the LLM sees it.
         
-        for step in range(max_steps):
-            print(f"\n--- Step {step + 1} ---")
-            
-            try:
-                # 1. Perception
-                print("👀 Scanning Screen...")
-                screen_context = get_screen_state(self.config)
-                
-                # 2. Reasoning
-                print("🧠 Thinking...")
-                decision = self.llm_client.get_decision(goal, screen_context)
-                reason = decision.get('reason', 'No reason provided')
-                print(f"💡 Decision: {reason}")
-                
-                # Check if task is complete
-                if decision.get('action') == 'done':
-                    print("✅ Goal Achieved.")
-                    return
-                
-                # 3. Action
-                self.action_executor.execute(decision)
-                
-                # Wait for UI to update
-                time.sleep(DEFAULT_WAIT_SECONDS)
+        Args:
+            goal: The goal to achieve
+            max_steps: Maximum number of steps to execute
+        """
+        logger.info("🚀 Android Use Agent Started. Goal: %s", goal)
+        logger.info(
+            "📡 Using LLM Provider: %s (%s)", self.config.provider_name, self.config.model
+        )
+        
+        screen_context = None
+        next_screen = None  # capture task started right after each action
+        decided_hash = None  # hash of the screen the last decision was made on
+        waited = False  # last step only waited, so do not wait again unasked
+        # Connect to the LLM server while the first screen is captured; the
+        # first decision does not wait for it and _shutdown cancels it
+        warm_up = asyncio.create_task(self.llm_client.awarm_up())
+        try:
+            for step in range(max_steps):
+                logger.info("\n--- Step %d ---", step + 1)
                 
-            except (ScreenCaptureError, LLMError, ValueError, ADBError) as e:
-                print(f"❌ Error in step {step + 1}: {str(e)}")
-                raise
+                try:
+                    # 1. Perception
+                    if next_screen is not None:
+                        screen_context = await next_screen
+                        next_screen = None
+                    elif screen_context is None:
+                        logger.info("👀 Scanning Screen...")
+                        screen_context = await get_screen_state_async(self.config)
+                    
+                    # The settled screen still matching the one the last
+                    # decision saw means the action had no visible effect
+                    # yet; wait once instead of asking the LLM about it again
+                    screen_hash = hashlib.blake2b(
+                        screen_context.encode(), digest_size=16
+                    ).digest()
+                    if screen_hash == decided_hash and not waited and step + 1 < max_steps:
+                        logger.info("⏳ UI unchanged, waiting...")
+                        waited = True
+                        next_screen = asyncio.create_task(wait_for_stable_ui(
+                            self.config, DEFAULT_WAIT_SECONDS * _WAIT_ACTION_FACTOR
+                        ))
+                        continue
+                    decided_hash = screen_hash
+                    waited = False
+                    
+                    # 2. Reasoning
+                    logger.info("🧠 Thinking...")
+                    decision = await self.llm_client.aget_decision(goal, screen_context)
+                    reason = decision.get('reason', 'No reason provided')
+                    logger.info("💡 Decision: %s", reason)
+                    
+                    # 3. Action ("done" raises GoalAchieved)
+                    settle_timeout = DEFAULT_WAIT_SECONDS
+                    if decision.get('action') == 'wait':
+                        # Nothing to send; give the UI longer to settle instead
+                        logger.info("⏳ Waiting...")
+                        settle_timeout *= _WAIT_ACTION_FACTOR
+                        waited = True
+                    else:
+                        await self.action_executor.execute_async(decision)
+                    
+                    # Start capturing the next screen in the background; the
+                    # last step has no next iteration to consume it
+                    if step + 1 < max_steps:
+                        logger.info("👀 Scanning Screen...")
+                        next_screen = asyncio.create_task(
+                            wait_for_stable_ui(self.config, settle_timeout)
+                        )
+                    
+                except (ScreenCaptureError, LLMError, ValueError, ADBError) as e:
+                    logger.error("❌ Error in step %d: %s", step + 1, e)
+                    raise
+        except GoalAchieved:
+            logger.info("✅ Goal Achieved.")
+        finally:
+            await self._shutdown(warm_up, next_screen)
+    
+    async def _shutdown(self, *tasks: Optional[asyncio.Task]) -> None:
+        """
+        Releases the run's background resources in dependency order.
+        
+        Pending tasks are cancelled and awaited first, since they may still
+        be using the LLM connection pool or the adb shell, which are closed
+        after them.
+        
+        Args:
+            tasks: The run's background tasks; None entries are skipped
+        """
+        started = [task for task in tasks if task is not None]
+        for task in started:
+            task.cancel()
+        # Also collects the exception of a task that finished unawaited
+        await asyncio.gather(*started, return_exceptions=True)
+        
+        await self.llm_client.aclose()
+        close_shell_sessions()
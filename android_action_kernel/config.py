@@ -1,5 +1,6 @@
 """Configuration management for Android Action Kernel."""
 import os
+import functools
 from dataclasses import dataclass
 
 
@@ -9,17 +10,18 @@ DEBUG_SEPARATOR_WIDTH = 80
 SPACE_REPLACEMENT = "%s"  # ADB requires %s for spaces in text input
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Config:
     """Configuration for the Android Action Kernel."""
     
     # ADB Configuration
     adb_path: str = "adb"
     screen_dump_path: str = "/sdcard/window_dump.xml"
-    local_dump_path: str = "window_dump.xml"
+    persistent_shell: bool = True
     
     # Debug Configuration
     debug_llm_payload: bool = False
+    debug_pretty_json: bool = False
     
     # LLM Provider Configuration
     provider: str = "openai"
@@ -27,52 +29,88 @@ class Config:
     api_url: str = ""
     api_key: str = ""
     provider_name: str = ""
+    llm_cache_ttl: float = 0.0  # seconds; 0 disables the decision cache
+    llm_best_of: int = 1  # parallel requests per async decision; first valid wins
+    llm_cache_prompt: bool = False  # ask self-hosted servers to keep the prompt KV cache
+    llm_stream: bool = False  # stream responses and act once the decision is complete
+    llm_timeout: float = 30.0  # seconds per LLM request
     
     @classmethod
     def from_env(cls) -> "Config":
         """Create configuration from environment variables."""
-        config = cls()
-        
-        # Debug configuration
-        debug_env = os.environ.get("DEBUG_LLM_PAYLOAD", "false").lower()
-        config.debug_llm_payload = debug_env in ("1", "true", "yes")
-        
         # LLM Provider configuration
-        provider_env = os.environ.get("LLM_PROVIDER", "openai").lower()
-        config.provider = provider_env
+        provider = _get_env("LLM_PROVIDER", default="openai").lower()
         
-        if provider_env == "glm":
-            config.model = "GLM-4.6"
-            config.api_url = os.environ.get(
-                "GLM_API_URL", 
-                "https://api.z.ai/api/coding/paas/v4"
-            )
-            config.api_key = os.environ.get(
-                "ZHIPU_API_KEY", 
-                os.environ.get("LOCAL_API_KEY", "your-api-key-1")
-            )
-            config.provider_name = "GLM-4.6"
-        elif provider_env == "ollama":
-            config.model = os.environ.get("OLLAMA_MODEL", "gemma3")
-            config.api_url = os.environ.get(
-                "OLLAMA_API_URL", 
-                "http://localhost:11434/v1"
-            )
-            config.api_key = os.environ.get(
-                "OLLAMA_API_KEY", 
-                "ollama"  # Ollama doesn't require a real key, but some clients expect it
-            )
-            config.provider_name = "Ollama"
+        if provider == "glm":
+            model = "GLM-4.6"
+            api_url = _get_env("GLM_API_URL", default="https://api.z.ai/api/coding/paas/v4")
+            api_key = _get_env("ZHIPU_API_KEY", "LOCAL_API_KEY", default="your-api-key-1")
+            provider_name = "GLM-4.6"
+        elif provider == "ollama":
+            model = _get_env("OLLAMA_MODEL", default="gemma3")
+            api_url = _get_env("OLLAMA_API_URL", default="http://localhost:11434/v1")
+            # Ollama doesn't require a real key, but some clients expect it
+            api_key = _get_env("OLLAMA_API_KEY", default="ollama")
+            provider_name = "Ollama"
         else:
-            config.model = os.environ.get("OPENAI_MODEL", "gpt-5.1-codex")
-            config.api_url = os.environ.get(
-                "OPENAI_API_URL", 
-                "http://localhost:8317/v1"
-            )
-            config.api_key = os.environ.get(
-                "OPENAI_API_KEY", 
-                os.environ.get("LOCAL_API_KEY", "your-api-key-1")
-            )
-            config.provider_name = "OpenAI"
+            model = _get_env("OPENAI_MODEL", default="gpt-5.1-codex")
+            api_url = _get_env("OPENAI_API_URL", default="http://localhost:8317/v1")
+            api_key = _get_env("OPENAI_API_KEY", "LOCAL_API_KEY", default="your-api-key-1")
+            provider_name = "OpenAI"
         
-        return config
+        return cls(
+            # ADB configuration
+            persistent_shell=_get_env_flag("ADB_PERSISTENT_SHELL", default=True),
+            # Debug configuration
+            debug_llm_payload=_get_env_flag("DEBUG_LLM_PAYLOAD"),
+            debug_pretty_json=_get_env_flag("DEBUG_PRETTY_JSON"),
+            provider=provider,
+            model=model,
+            api_url=api_url,
+            api_key=api_key,
+            provider_name=provider_name,
+            # Reuse decisions for an identical goal and screen for this many seconds
+            llm_cache_ttl=float(_get_env("LLM_CACHE_TTL", default="0")),
+            # Race this many identical requests and keep the first valid answer
+            llm_best_of=max(1, int(_get_env("LLM_BEST_OF", default="1"))),
+            # llama.cpp-style servers reuse the cached prompt prefix on request
+            llm_cache_prompt=_get_env_flag("LLM_CACHE_PROMPT"),
+            # Stream decisions and stop reading once the action is usable
+            llm_stream=_get_env_flag("LLM_STREAM"),
+            # Give up on an LLM request after this many seconds
+            llm_timeout=float(_get_env("LLM_TIMEOUT", default="30")),
+        )
+
+
+def _get_env(*keys: str, default: str) -> str:
+    """Returns the value of the first environment variable set among keys."""
+    environ = os.environ
+    for key in keys:
+        value = environ.get(key)
+        if value is not None:
+            return value
+    return default
+
+
+def _get_env_flag(key: str, default: bool = False) -> bool:
+    """Reads a boolean environment variable ("1", "true" or "yes")."""
+    value = os.environ.get(key)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+
+@functools.lru_cache(maxsize=1)
+def get_config() -> Config:
+    """
+    Returns the process-wide configuration, read from the environment once.
+    
+    The environment is not expected to change after start-up, so later calls
+    return the same instance. Use invalidate_config_cache() to re-read it.
+    """
+    return Config.from_env()
+
+
+def invalidate_config_cache() -> None:
+    """Drops the cached configuration so the next get_config() re-reads the environment."""
+    get_config.cache_clear()
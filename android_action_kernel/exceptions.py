@@ -14,3 +14,8 @@ class ScreenCaptureError(Exception):
 class LLMError(Exception):
     """Exception raised when LLM API call fails."""
     pass
+
+
+class GoalAchieved(Exception):
+    """Raised by the done action to end the agent loop."""
+    pass
@@ -1,11 +1,66 @@
 """LLM client using JSON mode."""
-from typing import Dict, Any
-
-from openai import OpenAI
+import asyncio
+import importlib.util
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from typing import TYPE_CHECKING, Dict, Any, List, Sequence
 
 from ..config import Config
 from .json_mode import JSONModeClient
 
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+logger = logging.getLogger(__name__)
+
+# Handler class per provider; unknown providers fall back to JSON mode
+_HANDLERS = {
+    "openai": JSONModeClient,
+    "glm": JSONModeClient,
+    "ollama": JSONModeClient,
+}
+
+# The agent makes one request per step, so a small pool of kept-alive
+# connections is enough to skip TCP/TLS setup after the first step
+_MAX_KEEPALIVE_CONNECTIONS = 4
+# Idle connections are kept for longer than the usual gap between steps
+_KEEPALIVE_EXPIRY_SECONDS = 30.0
+# The warm-up is only worth it if it finishes during the first capture
+_WARM_UP_TIMEOUT_SECONDS = 5.0
+
+# httpx only speaks HTTP/2 when the optional h2 package is installed
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+# Not every openai release ships on top of an importable httpx; without it
+# the SDK's own default transport is used as is
+_HTTPX_AVAILABLE = importlib.util.find_spec("httpx") is not None
+
+
+def _client_kwargs(config: Config, asynchronous: bool) -> Dict[str, Any]:
+    """Returns the keyword arguments shared by the sync and async clients."""
+    kwargs: Dict[str, Any] = {
+        "api_key": config.api_key,
+        "base_url": config.api_url,
+        "timeout": config.llm_timeout,
+    }
+    if not _HTTPX_AVAILABLE:
+        return kwargs
+    
+    import httpx
+    from openai import DefaultAsyncHttpxClient, DefaultHttpxClient
+    
+    # Without HTTP/2 each concurrent best-of request needs its own connection
+    keepalive = max(_MAX_KEEPALIVE_CONNECTIONS, config.llm_best_of)
+    http_client_cls = DefaultAsyncHttpxClient if asynchronous else DefaultHttpxClient
+    kwargs["http_client"] = http_client_cls(
+        http2=_HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_keepalive_connections=keepalive,
+            keepalive_expiry=_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    )
+    return kwargs
+
 
 class LLMClient:
     """LLM client wrapper that uses JSON mode."""
@@ -18,11 +73,71 @@ class LLMClient:
             config: Configuration object
         """
         self.config = config
-        self.client = OpenAI(
-            api_key=config.api_key,
-            base_url=config.api_url
+        self._client = None
+        self._async_client = None
+    
+    @property
+    def client(self) -> "OpenAI":
+        """OpenAI client, created on first access rather than at construction."""
+        if self._client is None:
+            # The SDK pulls in httpx and pydantic; only pay that on first use
+            from openai import OpenAI
+            
+            self._client = OpenAI(**_client_kwargs(self.config, asynchronous=False))
+        return self._client
+    
+    @property
+    def async_client(self) -> "AsyncOpenAI":
+        """AsyncOpenAI client, created on first access."""
+        if self._async_client is None:
+            from openai import AsyncOpenAI
+            
+            self._async_client = AsyncOpenAI(**_client_kwargs(self.config, asynchronous=True))
+        return self._async_client
+    
+    async def awarm_up(self) -> None:
+        """
+        Opens the async client's connection ahead of the first decision.
+        
+        A cheap GET /models completes the TCP/TLS handshake while the agent
+        captures the first screen. Failures are only logged; the first real
+        request simply connects on its own.
+        """
+        try:
+            # No retries and a short timeout: servers without /models, or slow
+            # ones, must not keep the warm-up around
+            await self.async_client.with_options(
+                max_retries=0, timeout=_WARM_UP_TIMEOUT_SECONDS
+            ).models.list()
+        except Exception as e:
+            logger.debug("LLM connection warm-up failed: %s", e)
+    
+    async def aclose(self) -> None:
+        """
+        Closes both HTTP clients and their connection pools.
+        
+        The async pool is bound to the running event loop, so it must not
+        outlive the loop. Both clients are recreated on next use.
+        """
+        client, self._client = self._client, None
+        async_client, self._async_client = self._async_client, None
+        if client is not None:
+            client.close()
+        if async_client is not None:
+            await async_client.close()
+    
+    @cached_property
+    def handler(self) -> JSONModeClient:
+        """
+        Provider handler, built on the first decision request.
+        
+        It is handed factories rather than clients, so a sync-only caller
+        never builds the async client and its pool, nor the other way round.
+        """
+        handler_cls = _HANDLERS.get(self.config.provider, JSONModeClient)
+        return handler_cls(
+            self.config, lambda: self.client, lambda: self.async_client
         )
-        self.handler = JSONModeClient(config, self.client)
     
     def get_decision(self, goal: str, screen_context: str) -> Dict[str, Any]:
         """
@@ -36,3 +151,68 @@ class LLMClient:
             Dictionary containing the action decision from LLM
         """
         return self.handler.get_decision(goal, screen_context)
+    
+    async def aget_decision(self, goal: str, screen_context: str) -> Dict[str, Any]:
+        """
+        Async variant of get_decision, so several goals can be in flight at once.
+        
+        Args:
+            goal: The user's goal to achieve
+            screen_context: JSON string representation of current screen state
+            
+        Returns:
+            Dictionary containing the action decision from LLM
+        """
+        return await self.handler.aget_decision(goal, screen_context)
+    
+    def get_decisions_batch(
+        self, goals: Sequence[str], screen_contexts: Sequence[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Requests decisions for several (goal, screen) pairs concurrently.
+        
+        Each pair is still its own request; they are issued in parallel over
+        the shared connection pool instead of one after another.
+        
+        Args:
+            goals: Goal for each task
+            screen_contexts: Screen context for each task, matching goals
+            
+        Returns:
+            Decisions in the same order as the inputs
+            
+        Raises:
+            ValueError: If the input lengths differ
+            LLMError: If any request fails
+        """
+        if len(goals) != len(screen_contexts):
+            raise ValueError("goals and screen_contexts must have the same length")
+        if len(goals) < 2:
+            return [self.get_decision(g, c) for g, c in zip(goals, screen_contexts)]
+        
+        with ThreadPoolExecutor(max_workers=len(goals)) as pool:
+            return list(pool.map(self.get_decision, goals, screen_contexts))
+    
+    async def aget_decisions_batch(
+        self, goals: Sequence[str], screen_contexts: Sequence[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Async variant of get_decisions_batch using asyncio.gather.
+        
+        Args:
+            goals: Goal for each task
+            screen_contexts: Screen context for each task, matching goals
+            
+        Returns:
+            Decisions in the same order as the inputs
+            
+        Raises:
+            ValueError: If the input lengths differ
+            LLMError: If any request fails
+        """
+        if len(goals) != len(screen_contexts):
+            raise ValueError("goals and screen_contexts must have the same length")
+        
+        return list(await asyncio.gather(*(
+            self.aget_decision(g, c) for g, c in zip(goals, screen_contexts)
+        )))
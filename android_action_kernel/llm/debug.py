@@ -1,71 +1,94 @@
 """Debug utilities for LLM payload formatting."""
-import json
+import io
+import logging
 from typing import Dict, Any
 
+from .. import _json
 from ..config import DEBUG_SEPARATOR_WIDTH
 
+logger = logging.getLogger(__name__)
 
-def format_message_content(content: str, role: str) -> str:
+
+def _pretty_json(text: str) -> str:
+    """Re-indents a JSON document, raising ValueError if it does not parse."""
+    return _json.dumps_pretty(_json.loads(text))
+
+
+def _write_indented(buf: io.StringIO, text: str) -> None:
+    """Writes text with every line, blank ones included, indented by two spaces."""
+    for index, line in enumerate(text.split("\n")):
+        buf.write("\n  " if index else "  ")
+        buf.write(line)
+
+
+def _write_message_content(
+    buf: io.StringIO, content: str, role: str, pretty: bool = False
+) -> None:
+    """Writes formatted message content to buf (see format_message_content)."""
+    if role != 'system' and content.startswith('SCREEN_CONTEXT:\n'):
+        screen_part = content[len('SCREEN_CONTEXT:\n'):]
+        if pretty:
+            try:
+                screen_part = _pretty_json(screen_part)
+            except ValueError:
+                pass
+        buf.write("  SCREEN_CONTEXT:\n")
+        _write_indented(buf, screen_part)
+        return
+    
+    _write_indented(buf, content)
+
+
+def format_message_content(content: str, role: str, pretty: bool = False) -> str:
     """
     Formats message content for debug output.
     
     Args:
         content: Message content string
         role: Message role (system/user)
+        pretty: Re-indent the screen context JSON instead of printing it as sent
         
     Returns:
         Formatted content string
     """
-    if role == 'system':
-        return "  " + content.replace('\n', '\n  ')
-    
-    if 'GOAL:' in content:
-        parts = content.split('\n\nSCREEN_CONTEXT:\n', 1)
-        if len(parts) == 2:
-            goal_part, screen_part = parts
-            formatted = "  " + goal_part.replace('\n', '\n  ')
-            formatted += "\n\n  SCREEN_CONTEXT:\n"
-            try:
-                screen_data = json.loads(screen_part)
-                formatted += "  " + json.dumps(
-                    screen_data, 
-                    indent=4, 
-                    ensure_ascii=False
-                ).replace('\n', '\n  ')
-            except json.JSONDecodeError:
-                formatted += "  " + screen_part.replace('\n', '\n  ')
-            return formatted
-    
-    return "  " + content.replace('\n', '\n  ')
+    buf = io.StringIO()
+    _write_message_content(buf, content, role, pretty)
+    return buf.getvalue()
 
 
-def print_payload_debug(payload: Dict[str, Any]) -> None:
+def print_payload_debug(payload: Dict[str, Any], pretty: bool = False) -> None:
     """
     Pretty prints the LLM payload for debugging purposes.
     
+    The output is built in memory and logged as one record, so a large
+    screen dump is not written line by line.
+    
     Args:
         payload: The payload dictionary to print
+        pretty: Re-indent the screen context JSON (slow for large dumps)
     """
     separator = "=" * DEBUG_SEPARATOR_WIDTH
-    print(f"\n{separator}")
-    print("📤 Payload being sent to LLM:")
-    print(separator)
-    print(f"\n🔧 Model: {payload['model']}")
+    buf = io.StringIO()
+    buf.write(f"\n{separator}\n")
+    buf.write("📤 Payload being sent to LLM:\n")
+    buf.write(f"{separator}\n")
+    buf.write(f"\n🔧 Model: {payload['model']}\n")
     
     if 'response_format' in payload:
-        print(f"📋 Response Format: {json.dumps(payload['response_format'], indent=2)}")
+        buf.write(f"📋 Response Format: {_json.dumps_pretty(payload['response_format'])}\n")
     elif 'tools' in payload:
-        print(f"🔧 Function Calling: Enabled ({len(payload['tools'])} functions)")
+        buf.write(f"🔧 Function Calling: Enabled ({len(payload['tools'])} functions)\n")
         if 'tool_choice' in payload:
-            print(f"📋 Tool Choice: {payload['tool_choice']}")
+            buf.write(f"📋 Tool Choice: {payload['tool_choice']}\n")
     
-    print(f"\n💬 Messages ({len(payload['messages'])}):")
-    print("-" * DEBUG_SEPARATOR_WIDTH)
+    buf.write(f"\n💬 Messages ({len(payload['messages'])}):\n")
+    buf.write("-" * DEBUG_SEPARATOR_WIDTH + "\n")
     
     for i, msg in enumerate(payload['messages'], 1):
-        print(f"\n  Message {i} - Role: {msg['role'].upper()}")
-        print("  " + "-" * (DEBUG_SEPARATOR_WIDTH - 2))
-        formatted_content = format_message_content(msg['content'], msg['role'])
-        print(formatted_content)
+        buf.write(f"\n  Message {i} - Role: {msg['role'].upper()}\n")
+        buf.write("  " + "-" * (DEBUG_SEPARATOR_WIDTH - 2) + "\n")
+        _write_message_content(buf, msg['content'], msg['role'], pretty)
+        buf.write("\n")
     
-    print(f"\n{separator}\n")
+    buf.write(f"\n{separator}\n")
+    logger.info("%s", buf.getvalue())
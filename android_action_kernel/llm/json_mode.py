@@ -1,28 +1,358 @@
 """JSON mode handler for LLM interactions."""
-import json
-from typing import Dict, Any
-
-from openai import OpenAI
+import copy
+import asyncio
+import time
+import hashlib
+import logging
+import threading
+import functools
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, Any, Optional, Tuple, Union
 
+from .. import _json
+from .._action_types import is_known_action
 from ..config import Config
 from ..exceptions import LLMError
 from .prompts import get_system_prompt_json_mode
 from .debug import print_payload_debug
+from .streaming import DecisionStreamParser
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+logger = logging.getLogger(__name__)
+
+_SYSTEM_PROMPT = get_system_prompt_json_mode()
+
+# Upper bound on cached decisions; the oldest entries are evicted first
+_CACHE_MAX_ENTRIES = 64
+
+
+def _noop(*args: Any, **kwargs: Any) -> None:
+    """Stands in for the debug printers when payload debugging is off."""
+
+
+def _print_response_debug(content: str) -> None:
+    logger.info("🔍 Debug - JSON Response: %s", content[:500])
+
+
+def _print_parsed_debug(parsed_json: Any) -> None:
+    logger.info("🔍 Debug - Parsed JSON: %s", _json.dumps_pretty(parsed_json))
+
+
+# Messages are ordered from most to least stable (system prompt, goal and
+# instructions, then the screen) so providers can reuse the cached prefix
+_USER_PREFIX = "GOAL: "
+_USER_SUFFIX = (
+    "\n\n"
+    "IMPORTANT: Output a JSON object with an 'action' field. "
+    "For example: {\"reason\": \"Going to home screen to find YouTube app\", \"action\": \"home\"}\n\n"
+    "CRITICAL: If the goal has been achieved based on the current screen state, "
+    "you MUST return {\"reason\": \"Goal achieved: [what was accomplished]\", \"action\": \"done\"}. "
+    "Do NOT continue taking actions after the goal is complete."
+)
+_SCREEN_HEADER = "SCREEN_CONTEXT:\n"
 
 
 class JSONModeClient:
     """LLM client using JSON mode (for OpenAI, GLM, etc.)."""
     
-    def __init__(self, config: Config, client: OpenAI):
+    def __init__(
+        self,
+        config: Config,
+        client: Union["OpenAI", Callable[[], "OpenAI"]],
+        async_client: Union["AsyncOpenAI", Callable[[], "AsyncOpenAI"], None] = None
+    ):
         """
         Initialize JSON mode client.
         
+        Either client may be given as a zero-argument factory instead of an
+        instance; it is then only called when that client is first needed.
+        
         Args:
             config: Configuration object
-            client: OpenAI client instance
+            client: OpenAI client instance or factory
+            async_client: AsyncOpenAI client instance or factory, required for
+                aget_decision
         """
         self.config = config
-        self.client = client
+        self._client = client
+        self._async_client = async_client
+        self._provider_name = config.provider_name
+        self._model = config.model
+        self._api_url = config.api_url
+        
+        # Everything but the user turn is fixed for the client's lifetime
+        self._system_message = {"role": "system", "content": _SYSTEM_PROMPT}
+        self._goal_turn: Tuple[Optional[str], Optional[Dict[str, str]]] = (None, None)
+        self._payload_template = {
+            "model": self._model,
+            "response_format": {"type": "json_object"},
+        }
+        if config.llm_cache_prompt:
+            # Non-standard field; hosted APIs cache prefixes automatically
+            self._payload_template["extra_body"] = {"cache_prompt": True}
+        self._stream = config.llm_stream
+        if self._stream:
+            self._payload_template["stream"] = True
+        
+        # Decisions keyed by a hash of (goal, screen), see LLM_CACHE_TTL
+        self._cache_ttl = config.llm_cache_ttl
+        self._cache: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()  # batch requests run in threads
+        self._best_of = config.llm_best_of
+        
+        # Bind the debug printers once so the hot path never checks the flag
+        if config.debug_llm_payload:
+            self._debug_payload = functools.partial(
+                print_payload_debug, pretty=config.debug_pretty_json
+            )
+            self._debug_response = _print_response_debug
+            self._debug_parsed = _print_parsed_debug
+        else:
+            self._debug_payload = self._debug_response = self._debug_parsed = _noop
+    
+    @property
+    def client(self) -> "OpenAI":
+        """OpenAI client used by the sync path."""
+        return self._client() if callable(self._client) else self._client
+    
+    @property
+    def async_client(self) -> Optional["AsyncOpenAI"]:
+        """AsyncOpenAI client used by the async path, or None if not given."""
+        if callable(self._async_client):
+            return self._async_client()
+        return self._async_client
+    
+    @staticmethod
+    def _cache_key(goal: str, screen_context: str) -> bytes:
+        """Hashes the inputs that fully determine the request."""
+        return hashlib.blake2b(
+            f"{goal}\0{screen_context}".encode("utf-8"), digest_size=16
+        ).digest()
+    
+    def _cache_get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        """Returns a copy of a cached decision that has not expired, if any."""
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            
+            stored_at, decision = entry
+            if time.monotonic() - stored_at > self._cache_ttl:
+                del self._cache[key]
+                return None
+            
+            self._cache.move_to_end(key)
+        
+        logger.info("♻️ %s API: Reusing cached decision", self._provider_name)
+        return copy.deepcopy(decision)
+    
+    def _cache_put(self, key: bytes, decision: Dict[str, Any]) -> None:
+        """Stores a copy of a decision, evicting the least recently used entry."""
+        entry = (time.monotonic(), copy.deepcopy(decision))
+        with self._cache_lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            if len(self._cache) > _CACHE_MAX_ENTRIES:
+                self._cache.popitem(last=False)
+    
+    def _build_payload(self, goal: str, screen_context: str) -> Dict[str, Any]:
+        """Builds the request payload for one decision."""
+        logger.info(
+            "🤖 %s API: Requesting decision (JSON mode) (model: %s, url: %s)",
+            self._provider_name, self._model, self._api_url
+        )
+        
+        # The goal turn only changes with the goal, so reuse it across steps.
+        # (goal, message) is swapped as one tuple so concurrent batch
+        # requests never pair a goal with another goal's message.
+        cached_goal, goal_message = self._goal_turn
+        if goal_message is None or goal != cached_goal:
+            goal_message = {
+                "role": "user",
+                "content": f"{_USER_PREFIX}{goal}{_USER_SUFFIX}"
+            }
+            self._goal_turn = (goal, goal_message)
+        
+        screen_message = {"role": "user", "content": _SCREEN_HEADER + screen_context}
+        payload = {
+            **self._payload_template,
+            "messages": [self._system_message, goal_message, screen_message],
+        }
+        
+        self._debug_payload(payload)
+        return payload
+    
+    def _parse_response(self, response: Any) -> Dict[str, Any]:
+        """
+        Extracts and validates the decision from a chat completion.
+        
+        Raises:
+            LLMError: If the response is empty or not a valid decision
+        """
+        if not response.choices:
+            raise LLMError("No choices in LLM response")
+        
+        choice = response.choices[0]
+        return self._parse_content(choice.message.content, choice.finish_reason)
+    
+    def _parse_content(self, content: Optional[str], finish_reason: Any) -> Dict[str, Any]:
+        """
+        Validates the decision in the response content.
+        
+        Raises:
+            LLMError: If the content is empty or not a valid decision
+        """
+        provider_name = self._provider_name
+        
+        # Handle JSON mode response
+        if content is None:
+            raise LLMError("Content is None in LLM response")
+        
+        # Strip whitespace and check if empty
+        content = content.strip()
+        if not content:
+            raise LLMError("Empty or whitespace-only content in LLM response")
+        
+        logger.info(
+            "✅ %s API: Success (status: %s)",
+            provider_name, finish_reason
+        )
+        
+        # Debug: Show the JSON response
+        self._debug_response(content)
+        
+        try:
+            parsed_json = _json.loads(content)
+            self._debug_parsed(parsed_json)
+            
+            # Validate that the response has the required "action" field
+            if not isinstance(parsed_json, dict):
+                raise LLMError(
+                    f"LLM response is not a JSON object. Got: {type(parsed_json).__name__}\n"
+                    f"Response: {content[:200]}"
+                )
+            
+            if "action" not in parsed_json:
+                raise LLMError(
+                    f"LLM response missing required 'action' field.\n"
+                    f"Response keys: {list(parsed_json.keys())}\n"
+                    f"Response: {content[:300]}"
+                )
+            
+            return parsed_json
+        except _json.JSONDecodeError as e:
+            # Log the actual content for debugging
+            content_preview = content[:200] if len(content) > 200 else content
+            error_msg = (
+                f"Failed to parse LLM response as JSON: {str(e)}\n"
+                f"Response content (first 200 chars): {repr(content_preview)}"
+            )
+            logger.error("❌ %s API: %s", provider_name, error_msg)
+            raise LLMError(error_msg) from e
+    
+    def _early_decision(self, decision: Dict[str, Any]) -> Dict[str, Any]:
+        """Logs a decision taken from a stream before it finished."""
+        logger.info("✅ %s API: Success (status: streamed)", self._provider_name)
+        self._debug_parsed(decision)
+        return decision
+    
+    def _stream_completion(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Streams a completion and returns as soon as the decision is usable.
+        
+        Raises:
+            LLMError: If the streamed content is not a valid decision
+        """
+        parser = DecisionStreamParser()
+        finish_reason = None
+        stream = self.client.chat.completions.create(**payload)
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                finish_reason = choice.finish_reason or finish_reason
+                if choice.delta.content:
+                    decision = parser.feed(choice.delta.content)
+                    if decision is not None:
+                        return self._early_decision(decision)
+        finally:
+            # Stops generation early when the decision was already complete
+            stream.close()
+        return self._parse_content(parser.text, finish_reason)
+    
+    async def _astream_completion(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async variant of _stream_completion.
+        
+        Raises:
+            LLMError: If the streamed content is not a valid decision
+        """
+        parser = DecisionStreamParser()
+        finish_reason = None
+        stream = await self.async_client.chat.completions.create(**payload)
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                finish_reason = choice.finish_reason or finish_reason
+                if choice.delta.content:
+                    decision = parser.feed(choice.delta.content)
+                    if decision is not None:
+                        return self._early_decision(decision)
+        finally:
+            await stream.close()
+        return self._parse_content(parser.text, finish_reason)
+    
+    async def _acomplete(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Requests one decision, streamed when LLM_STREAM is set."""
+        if self._stream:
+            return await self._astream_completion(payload)
+        response = await self.async_client.chat.completions.create(**payload)
+        return self._parse_response(response)
+    
+    async def _race_completions(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Sends the payload best-of times and returns the first valid decision.
+        
+        Requests still in flight are cancelled once one succeeds, so a slow or
+        malformed answer no longer decides the step's latency or outcome. An
+        answer naming an action the executor does not know is skipped too.
+        
+        Raises:
+            Exception: The last failure, if no request produced a valid decision
+        """
+        tasks = [
+            asyncio.create_task(self._acomplete(payload))
+            for _ in range(self._best_of)
+        ]
+        last_error: Optional[Exception] = None
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    decision = await next_done
+                except Exception as e:
+                    last_error = e
+                    continue
+                if is_known_action(decision["action"]):
+                    return decision
+                last_error = LLMError(f"Unknown action in LLM response: {decision['action']!r}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Let the losers finish cancelling so their connections go back
+            # to the pool and no pending task outlives the race
+            await asyncio.gather(*tasks, return_exceptions=True)
+        raise last_error
+    
+    def _wrap_error(self, error: Exception) -> LLMError:
+        """Logs a failed request and converts it to an LLMError."""
+        error_msg = f"{type(error).__name__}: {str(error)}"
+        logger.error("❌ %s API: Error - %s", self._provider_name, error_msg)
+        return LLMError(error_msg)
     
     def get_decision(self, goal: str, screen_context: str) -> Dict[str, Any]:
         """
@@ -38,93 +368,60 @@ class JSONModeClient:
         Raises:
             LLMError: If LLM API call fails
         """
-        print(
-            f"🤖 {self.config.provider_name} API: Requesting decision (JSON mode) "
-            f"(model: {self.config.model}, url: {self.config.api_url})"
-        )
+        key = None
+        if self._cache_ttl > 0:
+            key = self._cache_key(goal, screen_context)
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
         
-        payload = {
-            "model": self.config.model,
-            "response_format": {"type": "json_object"},
-            "messages": [
-                {"role": "system", "content": get_system_prompt_json_mode().strip()},
-                {
-                    "role": "user", 
-                    "content": (
-                        f"GOAL: {goal}\n\n"
-                        f"SCREEN_CONTEXT:\n{screen_context}\n\n"
-                        f"IMPORTANT: Output a JSON object with an 'action' field. "
-                        f"For example: {{\"action\": \"home\", \"reason\": \"Going to home screen to find YouTube app\"}}\n\n"
-                        f"CRITICAL: If the goal '{goal}' has been achieved based on the current screen state, "
-                        f"you MUST return {{\"action\": \"done\", \"reason\": \"Goal achieved: [what was accomplished]\"}}. "
-                        f"Do NOT continue taking actions after the goal is complete."
-                    )
-                }
-            ]
-        }
+        payload = self._build_payload(goal, screen_context)
+        try:
+            if self._stream:
+                decision = self._stream_completion(payload)
+            else:
+                response = self.client.chat.completions.create(**payload)
+                decision = self._parse_response(response)
+        except Exception as e:
+            raise self._wrap_error(e) from e
         
-        if self.config.debug_llm_payload:
-            print_payload_debug(payload)
+        if key is not None:
+            self._cache_put(key, decision)
+        return decision
+    
+    async def aget_decision(self, goal: str, screen_context: str) -> Dict[str, Any]:
+        """
+        Async variant of get_decision using the AsyncOpenAI client.
         
-        try:
-            response = self.client.chat.completions.create(**payload)
-            
-            if not response.choices:
-                raise LLMError("No choices in LLM response")
-            
-            choice = response.choices[0]
-            finish_reason = choice.finish_reason
-            message = choice.message
-            
-            # Handle JSON mode response
-            content = message.content
-            if content is None:
-                raise LLMError("Content is None in LLM response")
-            
-            # Strip whitespace and check if empty
-            content = content.strip()
-            if not content:
-                raise LLMError("Empty or whitespace-only content in LLM response")
-            
-            print(
-                f"✅ {self.config.provider_name} API: Success "
-                f"(status: {finish_reason})"
-            )
+        Args:
+            goal: The user's goal to achieve
+            screen_context: JSON string representation of current screen state
             
-            # Debug: Show the JSON response
-            if self.config.debug_llm_payload:
-                print(f"🔍 Debug - JSON Response: {content[:500]}")
+        Returns:
+            Dictionary containing the action decision from LLM
             
-            try:
-                parsed_json = json.loads(content)
-                if self.config.debug_llm_payload:
-                    print(f"🔍 Debug - Parsed JSON: {json.dumps(parsed_json, indent=2)}")
-                
-                # Validate that the response has the required "action" field
-                if not isinstance(parsed_json, dict):
-                    raise LLMError(
-                        f"LLM response is not a JSON object. Got: {type(parsed_json).__name__}\n"
-                        f"Response: {content[:200]}"
-                    )
-                
-                if "action" not in parsed_json:
-                    raise LLMError(
-                        f"LLM response missing required 'action' field.\n"
-                        f"Response keys: {list(parsed_json.keys())}\n"
-                        f"Response: {content[:300]}"
-                    )
-                
-                return parsed_json
-            except json.JSONDecodeError as e:
-                # Log the actual content for debugging
-                content_preview = content[:200] if len(content) > 200 else content
-                error_msg = (
-                    f"Failed to parse LLM response as JSON: {str(e)}\n"
-                    f"Response content (first 200 chars): {repr(content_preview)}"
-                )
-                print(f"❌ {self.config.provider_name} API: {error_msg}")
-                raise LLMError(error_msg) from e
+        Raises:
+            LLMError: If LLM API call fails or no async client was given
+        """
+        if self._async_client is None:
+            raise LLMError("aget_decision requires an async client")
+        
+        key = None
+        if self._cache_ttl > 0:
+            key = self._cache_key(goal, screen_context)
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+        
+        payload = self._build_payload(goal, screen_context)
+        try:
+            if self._best_of > 1:
+                decision = await self._race_completions(payload)
+            else:
+                decision = await self._acomplete(payload)
         except Exception as e:
-            error_msg = f"{type(e).__name__}: {str(e)}"
-            print(f"❌ {self.config.provider_name} API: Error - {error_msg}")
-            raise LLMError(error_msg) from e
+            raise self._wrap_error(e) from e
+        
+        if key is not None:
+            self._cache_put(key, decision)
+        return decision
@@ -0,0 +1,132 @@
+"""Incremental parsing of streamed JSON-mode decisions."""
+from typing import Any, Dict, List, Optional
+
+from .. import _json
+
+
+# Fields an action needs before it can be dispatched, besides "reason" which
+# every decision must carry (the agent logs it, and for "done" it is the goal
+# summary). The prompt asks for "reason" first, so a decision is usually
+# complete as soon as its last required value closes. Actions with optional
+# parameters (duration, verify) are left out: they wait for the full object
+# so a late optional field is never dropped.
+_REQUIRED_FIELDS = {
+    "tap": ("coordinates",),
+    "type": ("text",),
+    "key": ("keycode",),
+    "key_batch": ("keycodes",),
+    "plan": ("steps",),
+    "home": (),
+    "back": (),
+    "recent": (),
+    "settings": (),
+    "notification": (),
+    "get_current_app": (),
+    "get_device_info": (),
+    "get_screen_info": (),
+    "wait": (),
+    "done": (),
+}
+
+
+class DecisionStreamParser:
+    """
+    Accumulates streamed content and spots a usable decision early.
+    
+    Tracks string and nesting state so that every top-level comma, and the
+    end of every top-level string, array or object value, marks a point
+    where the fields read so far form valid JSON once the object is closed.
+    """
+    
+    def __init__(self):
+        """Initialize an empty parser."""
+        self._chunks: List[str] = []
+        self._length = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._in_value = False  # between a top-level ":" and the next ","
+        self._value_string = False  # the open string is a top-level value
+    
+    @property
+    def text(self) -> str:
+        """All content received so far."""
+        return "".join(self._chunks)
+    
+    def feed(self, chunk: str) -> Optional[Dict[str, Any]]:
+        """
+        Adds a chunk of content.
+        
+        Args:
+            chunk: Next piece of the streamed response
+        
+        Returns:
+            The decision once its action and required fields are complete,
+            otherwise None
+        """
+        offset = self._length
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+        
+        # Offsets up to which the content, closed with "}", may be complete
+        cuts = []
+        depth, in_string, escaped = self._depth, self._in_string, self._escaped
+        in_value, value_string = self._in_value, self._value_string
+        for index, char in enumerate(chunk):
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+                    if value_string:
+                        value_string = in_value = False
+                        cuts.append(offset + index + 1)
+            elif char == '"':
+                in_string = True
+                value_string = depth == 1 and in_value
+            elif char in "{[":
+                depth += 1
+            elif char in "}]":
+                depth -= 1
+                if depth == 1:
+                    in_value = False
+                    cuts.append(offset + index + 1)
+                elif depth == 0:
+                    cuts.append(offset + index)
+            elif depth == 1:
+                if char == ":":
+                    in_value = True
+                elif char == ",":
+                    in_value = False
+                    cuts.append(offset + index)
+        self._depth, self._in_string, self._escaped = depth, in_string, escaped
+        self._in_value, self._value_string = in_value, value_string
+        
+        if not cuts:
+            return None
+        
+        text = self.text
+        for cut in reversed(cuts):
+            try:
+                partial = _json.loads(text[:cut] + "}")
+            except ValueError:
+                continue
+            if _is_complete(partial):
+                return partial
+            break  # earlier cuts hold a subset of these fields
+        return None
+
+
+def _is_complete(partial: Any) -> bool:
+    """Whether a partial object already carries everything its action needs."""
+    if not isinstance(partial, dict):
+        return False
+    action = partial.get("action")
+    if not isinstance(action, str):
+        return False
+    required = _REQUIRED_FIELDS.get(action)
+    if required is None or "reason" not in partial:
+        return False
+    return all(field in partial for field in required)
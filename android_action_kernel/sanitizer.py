@@ -1,5 +1,33 @@
-import xml.etree.ElementTree as ET
-from typing import List, Dict, Tuple, Optional
+import io
+import re
+import sys
+import logging
+from typing import Iterator, List, Dict, Tuple, Optional, Union
+
+try:
+    from lxml import etree as ET
+    _HAS_LXML = True
+except ImportError:  # lxml is optional; the stdlib parser has the same API here
+    import xml.etree.ElementTree as ET
+    _HAS_LXML = False
+
+logger = logging.getLogger(__name__)
+
+# Attribute values parsed from the dump are often interned, so comparing
+# against an interned constant can short-circuit on identity
+_TRUE = sys.intern("true")
+
+# "[x1,y1][x2,y2]", e.g. "[140,200][400,350]"
+_BOUNDS_RE = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+
+if _HAS_LXML:
+    # Same test as _is_interactive_element, evaluated inside libxml2 on one
+    # window and its descendants at a time
+    _INTERACTIVE_XPATH = ET.XPath(
+        'descendant-or-self::node[@clickable="true" or @long-clickable="true"'
+        ' or @focus="true" or @focusable="true"'
+        ' or string-length(@text) > 0 or string-length(@content-desc) > 0]'
+    )
 
 
 class XMLParseError(Exception):
@@ -25,34 +53,48 @@ def _parse_bounds(bounds_str: str) -> Tuple[int, int, int, int]:
     Raises:
         BoundsParseError: If bounds string cannot be parsed
     """
-    try:
-        # Extract coordinates: "[140,200][400,350]" -> ["140", "200", "400", "350"]
-        coords_str = bounds_str.replace("][", ",").replace("[", "").replace("]", "")
-        coords = coords_str.split(",")
-        
-        if len(coords) != 4:
-            raise BoundsParseError(f"Expected 4 coordinates, got {len(coords)}")
-        
-        x1, y1, x2, y2 = map(int, coords)
-        return x1, y1, x2, y2
-        
-    except (ValueError, AttributeError) as e:
-        raise BoundsParseError(f"Failed to parse bounds '{bounds_str}': {str(e)}") from e
+    match = _BOUNDS_RE.match(bounds_str)
+    if match is None:
+        raise BoundsParseError(f"Failed to parse bounds '{bounds_str}'")
+    
+    x1, y1, x2, y2 = map(int, match.groups())
+    return x1, y1, x2, y2
 
 
-def _is_valid_bounds(x1: int, y1: int, x2: int, y2: int) -> bool:
+def _bounds_center(x1: int, y1: int, x2: int, y2: int) -> Tuple[int, int, bool]:
     """
-    Checks if bounds are valid (non-zero area).
+    Computes the center of a bounds box and whether it has a non-zero area.
     
     Args:
         x1, y1, x2, y2: Bounds coordinates
         
     Returns:
-        True if bounds have valid area
+        Tuple of (center_x, center_y, has_area)
     """
-    width = x2 - x1
-    height = y2 - y1
-    return width > 0 and height > 0
+    return (x1 + x2) // 2, (y1 + y2) // 2, x2 > x1 and y2 > y1
+
+
+def _grow_viewport(viewport: List[int], node: ET.Element) -> None:
+    """
+    Extends viewport in place to cover a top-level window node.
+    
+    Args:
+        viewport: [x1, y1, x2, y2], or an empty list before the first window
+        node: Direct child of the <hierarchy> root
+    """
+    try:
+        bounds = _parse_bounds(node.get("bounds", ""))
+    except BoundsParseError:
+        return
+    
+    if not viewport:
+        viewport.extend(bounds)
+        return
+    
+    viewport[0] = min(viewport[0], bounds[0])
+    viewport[1] = min(viewport[1], bounds[1])
+    viewport[2] = max(viewport[2], bounds[2])
+    viewport[3] = max(viewport[3], bounds[3])
 
 
 def _is_interactive_element(node: ET.Element) -> bool:
@@ -65,75 +107,109 @@ def _is_interactive_element(node: ET.Element) -> bool:
     Returns:
         True if element is interactive or has meaningful content
     """
-    is_clickable = node.attrib.get("clickable") == "true"
+    get = node.get  # lxml builds a proxy object on every .attrib access
+    is_clickable = (
+        get("clickable") == _TRUE or
+        get("long-clickable") == _TRUE
+    )
     is_editable = (
-        node.attrib.get("focus") == "true" or 
-        node.attrib.get("focusable") == "true"
+        get("focus") == _TRUE or 
+        get("focusable") == _TRUE
     )
-    has_text = bool(node.attrib.get("text", ""))
-    has_desc = bool(node.attrib.get("content-desc", ""))
+    has_text = bool(get("text", ""))
+    has_desc = bool(get("content-desc", ""))
     
     return is_clickable or is_editable or has_text or has_desc
 
 
-def _extract_element_data(node: ET.Element) -> Optional[Dict]:
+def _extract_element_data(
+    node: ET.Element, viewport: Optional[List[int]] = None
+) -> Optional[Dict]:
     """
     Extracts element data from an XML node.
     
     Args:
         node: XML element node
+        viewport: [x1, y1, x2, y2] of the visible screen; elements entirely
+            outside it are skipped
         
     Returns:
-        Dictionary with element data, or None if extraction fails
+        Dictionary with element data, or None if extraction fails or the
+        element is not worth sending to the LLM
     """
-    bounds = node.attrib.get("bounds")
+    get = node.get  # lxml builds a proxy object on every .attrib access
+    bounds = get("bounds")
     if not bounds:
         return None
     
+    # Newer dumps flag nodes scrolled out of view explicitly
+    if get("visible-to-user") == "false":
+        return None
+    
     try:
         x1, y1, x2, y2 = _parse_bounds(bounds)
     except BoundsParseError:
         return None
     
     # Filter out invalid bounds (zero area)
-    if not _is_valid_bounds(x1, y1, x2, y2):
+    center_x, center_y, has_area = _bounds_center(x1, y1, x2, y2)
+    if not has_area:
         return None
     
-    center_x = (x1 + x2) // 2
-    center_y = (y1 + y2) // 2
+    if viewport and (
+        x2 <= viewport[0] or y2 <= viewport[1] or
+        x1 >= viewport[2] or y1 >= viewport[3]
+    ):
+        return None
     
     # Extract all relevant fields
-    text = node.attrib.get("text", "")
-    content_desc = node.attrib.get("content-desc", "")
-    resource_id = node.attrib.get("resource-id", "")
-    class_name = node.attrib.get("class", "")
-    element_type = class_name.split(".")[-1] if class_name else ""
-    package = node.attrib.get("package", "")
-    hint = node.attrib.get("hint", "")
+    text = get("text", "")
+    content_desc = get("content-desc", "")
+    resource_id = get("resource-id", "")
+    element_type = get("class", "").rpartition(".")[2]
+    package = get("package", "")
+    hint = get("hint", "")
     
     # Interaction state
-    is_clickable = node.attrib.get("clickable") == "true"
-    is_long_clickable = node.attrib.get("long-clickable") == "true"
-    is_focusable = node.attrib.get("focusable") == "true"
-    is_focused = node.attrib.get("focused") == "true"
-    is_enabled = node.attrib.get("enabled", "true") == "true"
-    is_scrollable = node.attrib.get("scrollable") == "true"
-    is_checkable = node.attrib.get("checkable") == "true"
-    is_checked = node.attrib.get("checked") == "true"
-    is_password = node.attrib.get("password") == "true"
-    is_selected = node.attrib.get("selected") == "true"
-    
-    # Build element data with all relevant fields
+    is_clickable = get("clickable") == _TRUE
+    is_long_clickable = get("long-clickable") == _TRUE
+    is_focusable = get("focusable") == _TRUE
+    is_focused = get("focused") == _TRUE
+    is_enabled = get("enabled", _TRUE) == _TRUE
+    is_scrollable = get("scrollable") == _TRUE
+    is_checkable = get("checkable") == _TRUE
+    is_checked = get("checked") == _TRUE
+    is_password = get("password") == _TRUE
+    is_selected = get("selected") == _TRUE
+    
+    # A focusable container with no label and nothing to act on is noise
+    if not (
+        text or content_desc or resource_id or hint or
+        is_clickable or is_long_clickable or is_scrollable or is_checkable or
+        element_type == "EditText"
+    ):
+        return None
+    
+    # Every field sent to the LLM costs prompt tokens, so the element only
+    # carries its center plus fields that differ from their defaults. The
+    # center is all a tap needs; raw bounds are not included.
     element_data = {
-        "id": resource_id,
-        "text": text,
-        "content-desc": content_desc,
-        "type": element_type,
-        "bounds": bounds,
-        "center": [center_x, center_y],  # Use list for JSON serialization
-        "clickable": is_clickable,
-        "enabled": is_enabled,
+        "center": (center_x, center_y),  # Tuples serialize as JSON arrays
     }
+    if text:
+        element_data["text"] = text
+    if content_desc:
+        element_data["content-desc"] = content_desc
+    if resource_id:
+        element_data["id"] = resource_id
+    if element_type:
+        element_data["type"] = element_type
+    if is_clickable:
+        element_data["clickable"] = True
+    
+    # Almost every element is enabled, so only flag the exceptions
+    if not is_enabled:
+        element_data["enabled"] = False
     
     # Add package name if available
     if package:
@@ -165,13 +241,58 @@ def _extract_element_data(node: ET.Element) -> Optional[Dict]:
     return element_data
 
 
-def get_interactive_elements(xml_content: str) -> List[Dict]:
+def _iter_interactive_nodes(
+    xml_content: bytes, viewport: List[int]
+) -> Iterator[ET.Element]:
+    """
+    Yields the interactive nodes of a UI dump in document order.
+    
+    With lxml the filter runs as one XPath query per window, so
+    non-interactive nodes never reach Python. Otherwise the dump is streamed
+    with iterparse: attributes are complete at "start" and each node is
+    cleared at "end" once its subtree has been visited.
+    
+    Both paths grow the viewport the same way, so the output does not depend
+    on whether lxml is installed. Each node is yielded once the viewport
+    covers its own window and every window before it, but none after.
+    
+    Args:
+        xml_content: Raw UTF-8 XML bytes
+        viewport: Empty list, grown in place to the union of the top-level
+            window bounds seen so far
+    
+    Raises:
+        ET.ParseError: If the XML content cannot be parsed
+    """
+    if _HAS_LXML:
+        root = ET.fromstring(bytes(xml_content))
+        for window in root:
+            _grow_viewport(viewport, window)
+            yield from _INTERACTIVE_XPATH(window)
+        return
+    
+    depth = 0
+    for event, node in ET.iterparse(io.BytesIO(xml_content), events=("start", "end")):
+        if event == "end":
+            depth -= 1
+            node.clear()
+            continue
+        
+        depth += 1
+        if depth == 2:  # a window directly under <hierarchy>
+            _grow_viewport(viewport, node)
+        if _is_interactive_element(node):
+            yield node
+
+
+def get_interactive_elements(xml_content: Union[str, bytes]) -> List[Dict]:
     """
     Parses Android Accessibility XML and returns a lean list of interactive elements.
     Calculates center coordinates (x, y) for every clickable element.
     
     Args:
-        xml_content: XML string from Android accessibility tree
+        xml_content: Raw UTF-8 XML bytes from the Android accessibility tree;
+            str is also accepted but is re-encoded first
         
     Returns:
         List of dictionaries containing element information
@@ -179,24 +300,21 @@ def get_interactive_elements(xml_content: str) -> List[Dict]:
     Raises:
         XMLParseError: If XML content cannot be parsed
     """
+    if isinstance(xml_content, str):
+        xml_content = xml_content.encode("utf-8")
+    
+    elements = []
+    viewport: List[int] = []
+    
     try:
-        root = ET.fromstring(xml_content)
+        for node in _iter_interactive_nodes(xml_content, viewport):
+            # Extract element data
+            element_data = _extract_element_data(node, viewport)
+            if element_data:
+                elements.append(element_data)
     except ET.ParseError as e:
         error_msg = "Error parsing XML. The screen might be loading."
-        print(f"⚠️ {error_msg}")
+        logger.warning("⚠️ %s", error_msg)
         raise XMLParseError(error_msg) from e
 
-    elements = []
-    
-    # Recursively find all nodes
-    for node in root.iter():
-        # Skip non-interactive elements
-        if not _is_interactive_element(node):
-            continue
-        
-        # Extract element data
-        element_data = _extract_element_data(node)
-        if element_data:
-            elements.append(element_data)
-
-    return elements
\ No newline at end of file
+    return elements
@@ -1,25 +1,62 @@
 """
 Android Action Kernel - Main entry point.
 """
+import os
 import sys
+import queue
+import logging
+import logging.handlers
+
+
+def _start_logging() -> logging.handlers.QueueListener:
+    """
+    Routes all logging through a queue drained by a background thread.
+    
+    The agent loop only enqueues records; writing and flushing stdout
+    happens on the listener thread.
+    """
+    log_queue = queue.SimpleQueue()
+    
+    # LOG_LEVEL=DEBUG also shows every ADB command. Records are formatted
+    # by the QueueHandler before they are enqueued.
+    logging.basicConfig(
+        level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+        format="%(message)s",
+        handlers=[logging.handlers.QueueHandler(log_queue)],
+    )
+    listener = logging.handlers.QueueListener(
+        log_queue, logging.StreamHandler(sys.stdout)
+    )
+    listener.start()
+    return listener
 
-from android_action_kernel import Config, AndroidAgent
 
 if __name__ == "__main__":
+    listener = _start_logging()
+    logger = logging.getLogger("kernel")
+    
     # Example Goal: "Open settings and turn on Wi-Fi"
     # Or your demo goal: "Find the 'Connect' button and tap it"
     try:
         goal = input("Enter your goal: ")
         if not goal.strip():
-            print("❌ Error: Goal cannot be empty")
+            logger.error("❌ Error: Goal cannot be empty")
             sys.exit(1)
         
-        config = Config.from_env()
+        # Imported only once there is a goal, so the prompt appears without
+        # waiting on the package (and an immediate Ctrl-C skips it entirely)
+        import asyncio
+        from android_action_kernel import get_config, AndroidAgent
+        
+        config = get_config()
         agent = AndroidAgent(config)
-        agent.run(goal.strip())
+        asyncio.run(agent.run_async(goal.strip()))
     except KeyboardInterrupt:
-        print("\n\n⚠️ Interrupted by user")
+        logger.warning("\n\n⚠️ Interrupted by user")
         sys.exit(0)
     except Exception as e:
-        print(f"\n❌ Fatal error: {str(e)}")
+        logger.error("\n❌ Fatal error: %s", e)
         sys.exit(1)
+    finally:
+        # Flush queued records before the process exits
+        listener.stop()